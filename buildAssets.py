@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding:UTF-8 -*-
+# @Time  : 2020/3/6 0006 20:10
+# @File  : buildAssets.py
+# @email : spirit_az@foxmail.com
+from __future__ import print_function
+
+__author__ = 'ChenLiang.Miao'
+
+# +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import argparse
+import collections
+import datetime
+import fnmatch
+import hashlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+try:
+    from shutil import which as _which
+except ImportError:
+    from distutils.spawn import find_executable as _which
+
+from houdiniTools.scripts import perfTrace
+from houdiniTools.scripts import userDirs
+
+ROOT = os.path.dirname(os.path.abspath(__file__)).replace('\\', '/')
+THIS_FILE = os.path.abspath(__file__).replace('\\', '/')
+CONFIG_FILE = os.path.join(ROOT, 'buildAssets.json').replace('\\', '/')
+
+# proc function -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+# tool name -> default, each one overridden by buildAssets.json, then MCL_BUILD_<NAME>, then --tool name=path
+TOOLS = collections.OrderedDict([
+    ('python', sys.executable),
+    ('rcc', 'rcc'),
+    ('pyrcc5', 'pyrcc5'),
+    ('magick', 'magick'),
+])
+
+_UIC = ['{python}', THIS_FILE, '--compile-ui', '{input}', '{output}']
+
+# name -> inputs under root matching pattern, output name, commands run in order for each input.
+# output None rewrites the input in place.
+TARGETS = collections.OrderedDict([
+    ('houdini-ui', {'root': 'houdiniTools/scripts/UI', 'pattern': '*.ui', 'recursive': False,
+                    'output': '{stem}.py', 'steps': [_UIC]}),
+    ('houdini-qrc', {'root': 'houdiniTools/scripts/UI', 'pattern': '*.qrc', 'recursive': False,
+                     'output': '{stem}_rc.py', 'steps': [['{rcc}', '-o', '{output}', '{input}']]}),
+    ('maya-ui', {'root': 'mayaTools/scripts/UI', 'pattern': '*.ui', 'recursive': True,
+                 'output': '{stem}.py', 'steps': [_UIC + ['--qt', '{root}/mayaTools']]}),
+    ('maya-qrc', {'root': 'mayaTools/scripts/UI', 'pattern': '*.qrc', 'recursive': True,
+                  'output': '{stem}_rc.py', 'steps': [['{pyrcc5}', '-o', '{output}', '{input}']]}),
+    ('maya-png', {'root': 'mayaTools/icons', 'pattern': '*.png', 'recursive': True,
+                  'output': None, 'steps': [['{magick}', '{input}', '{input}']]}),
+])
+
+
+def stateDir(root=ROOT):
+    """
+    per checkout folder of the build state and the last report, out of the source tree.
+    Per user: a folder of the shared temp dir made by one user is not writable by the others
+    """
+    key = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(userDirs.userDir('build'), key).replace('\\', '/')
+
+
+def loadConfig(path=None):
+    """
+    {"tools": {"rcc": "D:/Houdini 17.0.352/bin/Qt/rcc.exe"}, "jobs": 4}, {} without the file
+    """
+    try:
+        with open(path or CONFIG_FILE, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return {}
+
+
+def resolveTools(overrides=None, config=None):
+    """
+    :param overrides: {name: path} of the command line, strongest
+    :return: {name: path}, a name found on PATH becomes its full path
+    """
+    tools = dict(TOOLS)
+    tools.update((config or {}).get('tools', {}))
+    for name in list(tools):
+        tools[name] = os.environ.get('MCL_BUILD_%s' % name.upper()) or tools[name]
+    tools.update(overrides or {})
+    for name, path in tools.items():
+        tools[name] = (_which(path) or path).replace('\\', '/')
+    return tools
+
+
+def _toolMissing(path):
+    return not os.path.isfile(path) and not _which(path)
+
+
+def fileHash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime]
+
+
+def _sameFile(path, stamp, digest):
+    """
+    unchanged since it was recorded: same size and mtime, or when those moved the same content
+    """
+    try:
+        if _stamp(path) == stamp:
+            return True
+        return fileHash(path) == digest
+    except (IOError, OSError):
+        return False
+
+
+def findInputs(spec, root=ROOT):
+    folder = os.path.join(root, spec['root'])
+    found = []
+    for dirPath, dirNames, fileNames in os.walk(folder):
+        dirNames[:] = sorted(d for d in dirNames if not d.startswith('.')) if spec.get('recursive') else []
+        for name in sorted(fileNames):
+            if fnmatch.fnmatch(name, spec['pattern']):
+                found.append(os.path.join(dirPath, name).replace('\\', '/'))
+    return found
+
+
+def _outputPath(spec, inputPath):
+    if not spec.get('output'):
+        return inputPath
+    folder, name = os.path.split(inputPath)
+    return '%s/%s' % (folder, spec['output'].format(stem=os.path.splitext(name)[0]))
+
+
+def _commands(spec, inputPath, outputPath, tools, root):
+    fields = dict(tools, input=inputPath, output=outputPath, root=root)
+    return [[arg.format(**fields) for arg in step] for step in spec['steps']]
+
+
+def _runTask(task):
+    """
+    pool worker: run the commands of one input, stop at the first failing one
+    """
+    start = perfTrace.clock()
+    result = {'key': task['key'], 'returncode': 0, 'error': None}
+    flags = 0x08000000 if os.name == 'nt' else 0  # CREATE_NO_WINDOW
+    for argv in task['commands']:
+        try:
+            proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=task['cwd'],
+                                    creationflags=flags)
+            out, err = proc.communicate()
+        except OSError as e:
+            result.update(returncode=None, error='%s: %s' % (argv[0], e))
+            break
+        if proc.returncode:
+            text = (err or out).decode('utf-8', 'replace').strip()
+            result.update(returncode=proc.returncode, error=text[-2000:])
+            break
+    result['seconds'] = perfTrace.clock() - start
+    return result
+
+
+def _loadState(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def _writeJson(path, data):
+    folder = os.path.dirname(path)
+    folder and not os.path.isdir(folder) and os.makedirs(folder)
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(tmp, path)
+
+
+def _reason(record, commands, inputPath, outputPath):
+    """
+    why an input has to be built again, None while it is up to date
+    """
+    if record is None:
+        return 'new'
+    if record.get('commands') != commands:
+        return 'commands'
+    if not _sameFile(inputPath, record.get('input'), record.get('inputHash')):
+        return 'input'
+    if outputPath != inputPath and not _sameFile(outputPath, record.get('output'), record.get('outputHash')):
+        return 'output'
+    return None
+
+
+def build(targets=None, root=ROOT, tools=None, jobs=None, force=False, statePath=None, reportPath=None,
+          config=None):
+    """
+    build the inputs of targets whose input, output or commands changed since the last build
+    :param targets: names of TARGETS, all by default
+    :param tools: {name: path} overrides, see resolveTools
+    :param jobs: worker processes, config "jobs" or the cpu count by default
+    :param force: build every input
+    :return: the report, also written to reportPath
+    """
+    started = time.time()
+    start = perfTrace.clock()
+    config = loadConfig(config) if not isinstance(config, dict) else config
+    tools = resolveTools(tools, config)
+    jobs = max(1, jobs or config.get('jobs') or multiprocessing.cpu_count())
+    folder = stateDir(root)
+    statePath = statePath or os.path.join(folder, 'state.json')
+    reportPath = reportPath or os.path.join(folder, 'report.json')
+    state = _loadState(statePath)
+
+    report = {'root': root, 'targets': [], 'tools': tools, 'jobs': jobs, 'built': [], 'skipped': [],
+              'failed': [], 'started': datetime.datetime.fromtimestamp(started).isoformat()}
+    tasks = []
+    for name in targets or list(TARGETS):
+        if name not in TARGETS:
+            raise KeyError('unknown target %r, one of %s' % (name, ', '.join(TARGETS)))
+        spec = TARGETS[name]
+        report['targets'].append(name)
+        for inputPath in findInputs(spec, root):
+            rel = os.path.relpath(inputPath, root).replace('\\', '/')
+            key = '%s:%s' % (name, rel)
+            outputPath = _outputPath(spec, inputPath)
+            commands = _commands(spec, inputPath, outputPath, tools, root)
+            reason = 'force' if force else _reason(state.get(key), commands, inputPath, outputPath)
+            entry = {'target': name, 'input': rel, 'output': os.path.relpath(outputPath, root).replace('\\', '/')}
+            if reason is None:
+                report['skipped'].append(entry)
+                # touched but the same content: new stamps, so it is not hashed again next run
+                state[key].update(input=_stamp(inputPath), output=_stamp(outputPath))
+                continue
+            entry['reason'] = reason
+            missing = [argv[0] for argv in commands if _toolMissing(argv[0])]
+            if missing:
+                entry.update(returncode=None, error='tool not found: %s' % missing[0])
+                report['failed'].append(entry)
+                continue
+            tasks.append((entry, {'key': key, 'commands': commands, 'cwd': root,
+                                  'input': inputPath, 'outputPath': outputPath}))
+
+    entries = dict((task['key'], (entry, task)) for entry, task in tasks)
+    if len(tasks) > 1 and jobs > 1:
+        pool = multiprocessing.Pool(min(jobs, len(tasks)))
+        try:
+            results = list(pool.imap_unordered(_runTask, [task for entry, task in tasks]))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_runTask(task) for entry, task in tasks]
+
+    for result in results:
+        entry, task = entries[result['key']]
+        entry['seconds'] = round(result['seconds'], 4)
+        if result['returncode'] == 0 and not os.path.isfile(task['outputPath']):
+            result.update(returncode=None, error='no output written')
+        if result['returncode'] != 0:
+            entry.update(returncode=result['returncode'], error=result['error'])
+            report['failed'].append(entry)
+            state.pop(result['key'], None)
+            continue
+        report['built'].append(entry)
+        # stamped after the build, an in place rewrite records the new content
+        state[result['key']] = {
+            'commands': task['commands'], 'input': _stamp(task['input']), 'inputHash': fileHash(task['input']),
+            'output': _stamp(task['outputPath']), 'outputHash': fileHash(task['outputPath'])}
+
+    for kind in ('built', 'skipped', 'failed'):
+        report[kind].sort(key=lambda e: (e['target'], e['input']))
+    report['counts'] = dict((kind, len(report[kind])) for kind in ('built', 'skipped', 'failed'))
+    report['seconds'] = round(perfTrace.clock() - start, 4)
+    _writeJson(statePath, state)
+    _writeJson(reportPath, report)
+    report['report'] = reportPath.replace('\\', '/')
+    return report
+
+
+def _compileUi(source, output, qtDir=None):
+    """
+    --compile-ui: pyside2uic of the python running it, hython / mayapy, written only when it compiled.
+    qtDir: folder of Qt.py, the form is converted to import Qt instead of PySide2
+    """
+    import pyside2uic
+    if sys.version_info[0] > 2:
+        import io
+        buf = io.StringIO()
+    else:
+        import cStringIO
+        buf = cStringIO.StringIO()
+    pyside2uic.compileUi(source, buf)
+    text = buf.getvalue()
+    if qtDir:
+        sys.path.insert(0, qtDir)
+        import Qt
+        text = ''.join(Qt._convert(text.splitlines(True)))
+    tmp = '%s.%d.tmp' % (output, os.getpid())
+    with open(tmp, 'w') as f:
+        f.write(text)
+    if os.path.exists(output):
+        os.remove(output)
+    os.rename(tmp, output)
+
+
+def main(argv=None, targets=None):
+    parser = argparse.ArgumentParser(description='incremental, parallel build of the .ui / .qrc / .png assets')
+    parser.add_argument('targets', nargs='*', default=targets, help='of %s, all by default' % ', '.join(TARGETS))
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes, the cpu count by default')
+    parser.add_argument('-f', '--force', action='store_true', help='build every input')
+    parser.add_argument('--tool', action='append', default=[], metavar='NAME=PATH',
+                        help='tool path, e.g. --tool rcc=/opt/hfs19.5/bin/rcc')
+    parser.add_argument('--config', help='json of tool paths and jobs, %s by default' % CONFIG_FILE)
+    parser.add_argument('--state', help='build state json')
+    parser.add_argument('--report', help='report json of this run')
+    parser.add_argument('--compile-ui', nargs=2, metavar=('UI', 'PY'), help=argparse.SUPPRESS)
+    parser.add_argument('--qt', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compile_ui:
+        _compileUi(args.compile_ui[0], args.compile_ui[1], args.qt)
+        return 0
+
+    tools = dict(item.split('=', 1) for item in args.tool)
+    report = build(args.targets or None, tools=tools, jobs=args.jobs, force=args.force, statePath=args.state,
+                   reportPath=args.report, config=args.config)
+    for entry in report['built']:
+        print('built   %-12s %s (%s)' % (entry['target'], entry['input'], entry['reason']))
+    for entry in report['failed']:
+        print('FAILED  %-12s %s: %s' % (entry['target'], entry['input'], entry['error']))
+    print('%(built)d built, %(skipped)d up to date, %(failed)d failed' % report['counts'],
+          'in %.2fs, report: %s' % (report['seconds'], report['report']))
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,153 +7,242 @@ __author__ = 'ChenLiang.Miao'
 
 # import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 
-import _winreg
-import ctypes
-import getpass
 import os
-import platform
 import re
-import shutil
+import sys
 import time
-import inspect
-# pyfastcopy is a simple Python module that monkey patches the shutil.copyfile function of Python standard library to internally use the sendfile system call.
-import pyfastcopy
-from imp import reload
-reload(pyfastcopy)
+
+from . import lazyImport
+from . import perfTrace
+
+# everything else loads on first use, importing openUI only pays for perfTrace
+LazyModule = lazyImport.LazyModule
+
+ctypes = LazyModule('ctypes')
+getpass = LazyModule('getpass')
+inspect = LazyModule('inspect')
+shutil = LazyModule('shutil')
+warnings = LazyModule('warnings')
+
+bulkDelete = LazyModule('.bulkDelete', __package__)
+copyBackend = LazyModule('.copyBackend', __package__)
+copyRules = LazyModule('.copyRules', __package__)
+copyScheduler = LazyModule('.copyScheduler', __package__)
+dedup = LazyModule('.dedup', __package__)
+diskUsage = LazyModule('.diskUsage', __package__)
+dirList = LazyModule('.dirList', __package__)
+fileJob = LazyModule('.fileJob', __package__)
+fileSync = LazyModule('.fileSync', __package__)
+keywordMatch = LazyModule('.keywordMatch', __package__)
+softwareInventory = LazyModule('.softwareInventory', __package__)
+treeSnapshot = LazyModule('.treeSnapshot', __package__)
+treeWatch = LazyModule('.treeWatch', __package__)
+versionFolder = LazyModule('.versionFolder', __package__)
 
 
 # function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 def isSubString(subString, Str):
-    flag = True
     for substr in subString:
         if substr not in Str:
-            flag = False
-    return flag
+            return False
+    return True
 
 
+@perfTrace.timed
 def GetFileList(FindPath, flagStr):
-    fileList = []
-    fileNames = os.listdir(FindPath)
-    if len(fileNames):
-        for fn in fileNames:
-            if len(flagStr):
-                if isSubString(flagStr, fn):
-                    fullFileName = os.path.join(FindPath, fn).replace('\\', '/')
-                    fileList.append(fullFileName)
-            else:
-                fullFileName = os.path.join(FindPath, fn).replace('\\', '/')
-                fileList.append(fullFileName)
-    if len(fileList):
-        fileList.sort()
-    return fileList
+    """
+    full paths of the entries of FindPath whose names contain every keyword
+    :param FindPath:
+    :param flagStr: keywords, or a keywordMatch.KeywordMatcher for any-of / none-of filters
+    :return:
+    """
+    fileNames = dirList.listNames(FindPath)
+    if isinstance(flagStr, keywordMatch.KeywordMatcher):
+        fileNames = flagStr.filter(fileNames)
+    elif len(flagStr):
+        fileNames = [fn for fn in fileNames if isSubString(flagStr, fn)]
+    return [os.path.join(FindPath, fn).replace('\\', '/') for fn in fileNames]
 
 
 def getListFlag(FindPath, flagStr):
-    fileList = []
     fileNames = getListDir(FindPath, 'file')
-    if len(fileNames):
-        for fn in fileNames:
-            if len(flagStr):
-                if os.path.splitext(fn)[-1] == flagStr:
-                    fileList.append(fn)
-            else:
-                fileList.append(fn)
-    if len(fileList):
-        fileList.sort()
-    return fileList
+    if not len(flagStr):
+        return fileNames
+    return [fn for fn in fileNames if os.path.splitext(fn)[-1] == flagStr]
 
 
-def getListDirK(filepath, mothon, keyword):
-    fileList = getListDir(filepath, mothon)
+def getListDirK(filepath, mothon, keyword, cached=True):
+    fileList = getListDir(filepath, mothon, cached)
     for each in fileList:
         if re.findall(keyword, each):
             yield each
 
 
-def getListDir(filepath, mothon):
-    if not os.path.exists(filepath):
+@perfTrace.timed
+def getListDir(filepath, mothon, cached=True, matcher=None):
+    """
+    sorted folder or file names of filepath
+    :param filepath:
+    :param mothon: 'dir' or 'file'
+    :param cached: reuse the listing while the folder's mtime is unchanged, see dirList.ListingCache
+    :param matcher: keywordMatch.KeywordMatcher the names have to pass
+    :return:
+    """
+    if mothon not in ('dir', 'file'):
         return []
-    dirs = os.listdir(filepath)
-    fileList = []
-    for each in dirs:
-        if mothon == 'dir' and os.path.isdir(os.path.join(filepath, each)):
-            fileList.append(each)
+    fileList = dirList.listNames(filepath, mothon, cached)
+    if matcher is not None:
+        fileList = matcher.filter(fileList)
+    return fileList
 
-        elif mothon == 'file' and os.path.isfile(os.path.join(filepath, each)):
-            fileList.append(each)
 
-    if len(fileList):
-        fileList.sort()
-    return fileList
+def getTreeChanges(FindPath, statFiles=True, caller=None):
+    """
+    files and folders added / removed / modified under FindPath since the last call of the same caller,
+    from a treeSnapshot index instead of comparing two full listings
+    :param FindPath:
+    :param statFiles: False only looks for added / removed entries, no stat of unchanged folders' files
+    :param caller: name of the index, the calling module by default, so two tools never consume each
+                   other's changes
+    :return: treeSnapshot.TreeDiff of paths relative to FindPath
+    """
+    caller = caller or sys._getframe(1).f_globals.get('__name__', treeSnapshot.DEFAULT_CALLER)
+    return treeSnapshot.diffTree(FindPath, statFiles=statFiles, caller=caller)
 
 
-def copyFiles(sourceDir, targetDir):
+def preflightCopyFiles(sourceDir, targetDir, strict=True, margin=0.05, rules=None):
     """
-    Copy all files in a directory to a specified directory
+    check that targetDir has room for what copyFiles would copy, before any file is written
     :param sourceDir:
     :param targetDir:
-    :return:
+    :param strict: raise diskUsage.NotEnoughSpace when it does not fit, False only warns
+    :param margin: extra fraction of the needed bytes to keep free, for blocks and metadata
+    :param rules: include / exclude rules, see copyFiles
+    :return: diskUsage.CopyPlan
+    """
+    plan = diskUsage.planCopy(sourceDir, targetDir, rules=rules)
+    free = getFreeSpaceMByte(diskUsage.existingParent(targetDir)) * 1024 * 1024
+    if plan.needed * (1 + margin) > free:
+        error = diskUsage.NotEnoughSpace(plan, free)
+        if strict:
+            raise error
+        warnings.warn(str(error), diskUsage.SpaceWarning, stacklevel=2)
+    return plan
+
+
+@perfTrace.timed
+def copyFiles(sourceDir, targetDir, manifest=False, workers=1, verify=False, journal=None, callback=None,
+              preflight=False, rules=None):
+    """
+    Copy all files in a directory to a specified directory,
+    files whose size and mtime are unchanged since the last copy are skipped
+    :param sourceDir:
+    :param targetDir:
+    :param manifest: compare against a manifest kept in targetDir instead of the target files
+    :param workers: number of copy threads, 1 copies serially
+    :param verify: checksum every file while it streams and keep the digests in the manifest
+    :param journal: journal file; run as a resumable fileJob.FileJob, serially, instead
+    :param callback: callback(done, total, operation) after every file of a journaled run
+    :param preflight: refuse with diskUsage.NotEnoughSpace before copying when targetDir is too full
+    :param rules: include / exclude globs, excluded folders are pruned without being listed:
+                  a copyRules.CopyRules, {'include': [...], 'exclude': [...]} or a json file of that dict.
+                  .svn folders are excluded by default.
+    :return: fileSync.SyncStats with copied / skipped / bytes counts and the failed files in order
+    """
+    rules = copyRules.asRules(rules)
+    if preflight:
+        preflightCopyFiles(sourceDir, targetDir, rules=rules)
+    if journal:
+        return fileJob.runJob(journal, fileJob.planCopyFiles, (sourceDir, targetDir, rules), callback)
+    return fileSync.syncFiles(sourceDir, targetDir, manifest=manifest, workers=workers, verify=verify, rules=rules)
+
+
+def scheduleCopyFiles(sourceDir, targetDir, background=True, rate=None, rules=None):
+    """
+    copyFiles on the session's copyScheduler, returns at once
+    :param sourceDir:
+    :param targetDir:
+    :param background: throttled and yielding to interactive jobs, False runs it as interactive
+    :param rate: bandwidth limit of every background job in bytes / second, None keeps the current one
+    :param rules: include / exclude rules, see copyFiles
+    :return: copyScheduler.ScheduledJob, with pause() / resume() / cancel() / wait()
+    """
+    scheduler = copyScheduler.getScheduler()
+    rate is not None and scheduler.setRate(rate)
+    priority = copyScheduler.BACKGROUND if background else copyScheduler.INTERACTIVE
+    return scheduler.submitCopy(sourceDir, targetDir, priority, rules=copyRules.asRules(rules))
+
+
+def watchCopyFiles(sourceDir, targetDir, manifest=True, workers=1, rules=None):
+    """
+    run copyFiles again whenever files change under sourceDir, instead of on a timer
+    :param sourceDir:
+    :param targetDir:
+    :param manifest: see copyFiles; on by default so the reruns do not stat the whole target
+    :param workers: see copyFiles
+    :param rules: see copyFiles
+    :return: treeWatch.Watch, stop it with treeWatch.getWatcher().unwatch(watch)
     """
-    if sourceDir.find(".svn") > 0:
-        return
-    for f in os.listdir(sourceDir):
-        sourceFile = os.path.join(sourceDir, f)
-        targetFile = os.path.join(targetDir, f)
-        if os.path.isfile(sourceFile):
-            if not os.path.exists(targetDir):
-                os.makedirs(targetDir)
-            if not os.path.exists(targetFile) or (
-                    os.path.exists(targetFile) and (
-                    time.gmtime(os.path.getmtime(targetFile)) != time.gmtime(
-                os.path.getmtime(sourceFile)))):
-                try:
-                    shutil.copyfile(sourceFile, targetFile)
-                except:
-                    pass
-        if os.path.isdir(sourceFile):
-            copyFiles(sourceFile, targetFile)
-
-
-def removeFileInFirstDir(targetDir):
+    def changed(paths):
+        copyFiles(sourceDir, targetDir, manifest=manifest, workers=workers, rules=rules)
+
+    return treeWatch.getWatcher().watch(sourceDir, changed)
+
+
+@perfTrace.timed
+def removeFileInFirstDir(targetDir, journal=None, callback=None, background=False):
     """
     Delete all files in the first level directory
     :param targetDir:
-    :return:
+    :param journal: journal file; run as a resumable fileJob.FileJob
+    :param callback: callback(done, total, operation) after every file of a journaled run
+    :param background: move the files to the trash and delete them on a background thread
+    :return: bulkDelete.DeleteResult when background
     """
+    if journal:
+        return fileJob.runJob(journal, fileJob.planRemoveFileInFirstDir, (targetDir,), callback)
+    if background:
+        return bulkDelete.removeFiles([e.path for e in dirList.listEntries(targetDir, withStat=False) if e.is_file])
     for file in os.listdir(targetDir):
         targetFile = os.path.join(targetDir, file)
         if os.path.isfile(targetFile):
             os.remove(targetFile)
 
 
-def remove_dir(dir):
+@perfTrace.timed
+def remove_dir(dir, journal=None, callback=None, background=False):
     """
 
     :param dir:
-    :return:
+    :param journal: journal file; delete file by file as a resumable fileJob.FileJob
+    :param callback: callback(done, total, operation) after every file of a journaled run
+    :param background: rename dir into the trash and return at once, the files are deleted
+                       on a background thread
+    :return: bulkDelete.DeleteResult with the reclaimed bytes when background
     """
+    if journal:
+        return fileJob.runJob(journal, fileJob.planRemoveDir, (dir,), callback)
+    if background:
+        return bulkDelete.removeTree(dir)
     shutil.rmtree(dir)
 
 
-def coverFiles(sourceDir, targetDir):
+@perfTrace.timed
+def coverFiles(sourceDir, targetDir, workers=1, journal=None, callback=None):
     """
     Copy all files in the first level directory to the specified directory
     :param sourceDir:
     :param targetDir:
-    :return:
+    :param workers: number of copy threads, 1 copies serially
+    :param journal: journal file; run as a resumable fileJob.FileJob, serially, instead
+    :param callback: callback(done, total, operation) after every file of a journaled run
+    :return: fileSync.SyncStats, failed files are in .errors in listing order
     """
-
-    for file in os.listdir(sourceDir):
-        sourceFile = os.path.join(sourceDir, file)
-        targetFile = os.path.join(targetDir, file)
-        # cover the files
-        if os.path.isfile(sourceFile):
-            try:
-                shutil.copyfile(sourceFile, targetFile)
-            except:
-                pass
+    if journal:
+        return fileJob.runJob(journal, fileJob.planCoverFiles, (sourceDir, targetDir), callback)
+    return fileSync.coverFiles(sourceDir, targetDir, workers=workers)
 
 
 def moveFileto(sourceDir, targetDir):
@@ -161,9 +250,13 @@ def moveFileto(sourceDir, targetDir):
     Copy the specified file to the directory
     :param sourceDir:
     :param targetDir:
-    :return:
+    :return: name of the copyBackend used
     """
-    shutil.copy(sourceDir, targetDir)
+    if os.path.isdir(targetDir):
+        targetDir = os.path.join(targetDir, os.path.basename(sourceDir))
+    backend = copyBackend.copyFile(sourceDir, targetDir)
+    shutil.copymode(sourceDir, targetDir)
+    return backend
 
 
 def writeVersionInfo(targetDir):
@@ -187,56 +280,56 @@ def open_sys(in_path):
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 
-def listDel(lists):
+def listDel(lists, key=None):
+    """
+    remove duplicates, keeping the first seen order
+    :param lists:
+    :param key: compare items by key(item), e.g. dedup.pathKey for paths
+    :return:
+    """
     if not lists:
         return []
-    newlist = []
-    for each in lists:
-        each in newlist or newlist.append(each)
-    return newlist
+    return dedup.unique(lists, key)
 
 
 def get_new_ver(in_path):
+    """
+    name of the next vNNN folder in in_path, nothing is created.
+    Use reserve_new_ver when publishing, another artist may take the name first.
+    """
     os.path.exists(in_path) or os.makedirs(in_path)
-    vers = sorted(getListDirK(in_path, 'dir', '^v\d{3}$'), key=lambda x: re.findall('^\d{3}$', x)[0])[0]
-    return get_new_version(vers)
+    return versionFolder.getAllocator(in_path).peek()
+
+
+def reserve_new_ver(in_path):
+    """
+    create the next vNNN folder in in_path atomically
+    :return: (name, path)
+    """
+    return versionFolder.getAllocator(in_path).reserve()
 
 
 def get_new_version(new_ver):
     if not new_ver:
         return 'v001'
 
-    new_ver = 'v%s' % (int(new_ver[1:]) + 1)
-
-    while len(new_ver) < 4:
-        new_ver = new_ver.replace('v', 'v0')
-
-    return new_ver
+    return versionFolder.formatVersion(int(new_ver[1:]) + 1)
 
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 
-def get_all_exe():
-    sub_key = [r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall',
-               r'SOFTWARE\Wow6432Node\Microsoft\Windows\CurrentVersion\Uninstall']
-
-    software_name = []
-
-    for i in sub_key:
-        key = _winreg.OpenKey(_winreg.HKEY_LOCAL_MACHINE, i, 0, _winreg.KEY_ALL_ACCESS)
-        for j in range(0, _winreg.QueryInfoKey(key)[0] - 1):
-            try:
-                key_name = _winreg.EnumKey(key, j)
-                key_path = i + '\\' + key_name
-                each_key = _winreg.OpenKey(_winreg.HKEY_LOCAL_MACHINE, key_path, 0, _winreg.KEY_ALL_ACCESS)
-                DisplayName, REG_SZ = _winreg.QueryValueEx(each_key, 'DisplayName')
-                DisplayName = DisplayName.encode('utf-8')
-                software_name.append(DisplayName)
-            except WindowsError:
-                pass
-
-    software_name = sorted(set(software_name))
-    return software_name
+def get_all_exe(refresh=False):
+    """
+    names of the installed programs: registry Uninstall keys on windows, .desktop files and /opt on linux.
+    Cached on disk by softwareInventory, a repeated call only stats the sources.
+    :param refresh: scan again, whatever the cache says
+    :return: sorted names
+    """
+    names = softwareInventory.getInventory().names(refresh)
+    if sys.version_info[0] < 3:
+        # the registry crawl always handed out utf-8 byte strings
+        names = [n if isinstance(n, str) else n.encode('utf-8') for n in names]
+    return names
 
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
@@ -252,13 +345,11 @@ def get_author():
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 
 def s_time(func):
-    def wrapper(*args):
-        s = time.clock()
-        func(*args)
-        e = time.clock()
-        print 'time consuming: ', e - s
-
-    return wrapper
+    """
+    record the time of every call of func, see perfTrace.timed;
+    read it with perfTrace.report() once perfTrace.enable() or MCL_PERF_TRACE=1 turned recording on
+    """
+    return perfTrace.timed(func)
 
 
 def getFreeSpaceMByte(folder):
@@ -267,7 +358,7 @@ def getFreeSpaceMByte(folder):
     :param folder: The folder to query
     :return: M
     """
-    if platform.system() == 'Windows':
+    if os.name == 'nt':
         free_bytes = ctypes.c_ulonglong(0)
         ctypes.windll.kernel32.GetDiskFreeSpaceExW(ctypes.c_wchar_p(folder), None, None, ctypes.pointer(free_bytes))
         return free_bytes.value * 1.0 / (1024 * 1024)
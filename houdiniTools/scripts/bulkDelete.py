@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  11:30
+# Email     : spirit_az@foxmail.com
+# File      : bulkDelete.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import errno
+import os
+import threading
+import uuid
+from multiprocessing.pool import ThreadPool
+
+from . import dirList
+from . import userDirs
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+TRASH_NAME = dirList.TRASH_NAME
+DEFAULT_WORKERS = 8
+
+_registryLock = threading.Lock()
+# trash folders already in the registry, each is written once
+_known = set()
+
+
+def registryPath():
+    """
+    text file listing every trash folder the current user has used, read by reapLeftovers.
+    per user: reapLeftovers empties whatever it lists
+    """
+    return os.path.join(userDirs.userDir('bulkDelete'), 'trashFolders.txt').replace('\\', '/')
+
+
+def _register(trash):
+    with _registryLock:
+        if trash in _known:
+            return
+        if trash not in _registered():
+            with open(registryPath(), 'a') as f:
+                f.write(trash + '\n')
+        _known.add(trash)
+
+
+def isTrash(path):
+    """
+    whether path is a trash folder of the current user, the only folders reapLeftovers empties
+    """
+    return (os.path.basename(path.rstrip('/\\')) == TRASH_NAME and os.path.isdir(path) and
+            not os.path.islink(path) and userDirs.isOwned(path))
+
+
+def _pruneRegistry():
+    with _registryLock:
+        alive = [t for t in _registered() if isTrash(t)]
+        _known.intersection_update(alive)
+        with open(registryPath(), 'w') as f:
+            f.writelines(t + '\n' for t in alive)
+
+
+def _registered():
+    try:
+        with open(registryPath(), 'r') as f:
+            return sorted(set(line.strip() for line in f if line.strip()))
+    except (IOError, OSError):
+        return []
+
+
+class DeleteResult(object):
+    """
+    progress of a background delete; bytes / files grow while the reaper runs
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self.files = 0
+        self.errors = []
+        self.callbacks = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _add(self, files, size):
+        with self._lock:
+            self.files += files
+            self.bytes += size
+
+    def _finish(self):
+        self._done.set()
+        for callback in self.callbacks:
+            callback(self)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def __repr__(self):
+        return '<DeleteResult files=%d bytes=%d errors=%d done=%s>' % (
+            self.files, self.bytes, len(self.errors), self.done)
+
+
+def moveToTrash(path):
+    """
+    rename path into the trash folder next to it; same file system, so it is one atomic rename
+    :return: path in the trash
+    """
+    path = os.path.abspath(path)
+    trash = os.path.join(os.path.dirname(path), TRASH_NAME)
+    try:
+        os.mkdir(trash)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    target = os.path.join(trash, '%s.%s' % (os.path.basename(path), uuid.uuid4().hex))
+    _register(trash)
+    os.rename(path, target)
+    dirList.invalidate(os.path.dirname(path))
+    return target
+
+
+def _reapDir(result):
+    """
+    worker: unlink the files of one folder, hand its sub folders back
+    """
+
+    def task(folder):
+        subDirs = []
+        files = size = 0
+        try:
+            for e in dirList.scandir(folder):
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        subDirs.append(e.path)
+                        continue
+                    n = e.stat(follow_symlinks=False).st_size
+                    os.unlink(e.path)
+                    files += 1
+                    size += n
+                except OSError as err:
+                    if err.errno != errno.ENOENT:
+                        result.errors.append((e.path, err))
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                result.errors.append((folder, err))
+        result._add(files, size)
+        return subDirs
+
+    return task
+
+
+def reap(paths, result=None, workers=DEFAULT_WORKERS):
+    """
+    delete trees folder by folder on a thread pool, then the folders themselves deepest first
+    :return: DeleteResult
+    """
+    result = result or DeleteResult()
+    task = _reapDir(result)
+    pool = ThreadPool(workers)
+    try:
+        level = [p for p in paths if os.path.isdir(p) and not os.path.islink(p)]
+        folders = list(level)
+        while level:
+            level = [sub for subs in pool.map(task, level) for sub in subs]
+            folders.extend(level)
+    finally:
+        pool.close()
+        pool.join()
+    for folder in reversed(folders):
+        try:
+            os.rmdir(folder)
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                result.errors.append((folder, err))
+    for p in paths:
+        if os.path.islink(p) or os.path.isfile(p):
+            try:
+                n = os.lstat(p).st_size
+                os.unlink(p)
+                result._add(1, n)
+            except OSError as err:
+                result.errors.append((p, err))
+    return result
+
+
+def _reapInBackground(paths, cleanTrash=(), prune=False, result=None):
+    result = result or DeleteResult()
+
+    def run():
+        try:
+            reap(paths, result)
+            for trash in cleanTrash:
+                try:
+                    # only succeeds once the trash is empty, another session may still use it
+                    os.rmdir(trash)
+                except OSError:
+                    pass
+            prune and _pruneRegistry()
+        finally:
+            result._finish()
+
+    t = threading.Thread(target=run, name='bulkDelete')
+    t.daemon = True
+    t.start()
+    return result
+
+
+def _remove(paths):
+    result = DeleteResult()
+    trashed = []
+    for path in paths:
+        try:
+            trashed.append(moveToTrash(path))
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EBUSY):
+                raise
+            # a mount point, or a trash on another device: no rename possible, delete it here and now
+            reap([path], result)
+            folder = os.path.dirname(os.path.abspath(path))
+            try:
+                # the trash moveToTrash made for it, only when empty, another delete may be using it
+                os.rmdir(os.path.join(folder, TRASH_NAME))
+            except OSError:
+                pass
+            dirList.invalidate(folder)
+    return _reapInBackground(trashed, sorted(set(os.path.dirname(p) for p in trashed)), result=result)
+
+
+def removeTree(path):
+    """
+    remove a folder at once for the caller: rename it into the trash, reap it on a background thread.
+    Whatever is not reaped when the process ends is picked up by reapLeftovers.
+    A folder that cannot be renamed, e.g. a mount point, is deleted before this returns.
+    :return: DeleteResult
+    """
+    return _remove([path])
+
+
+def removeFiles(paths):
+    """
+    same as removeTree for single files, e.g. the first level files of a folder
+    """
+    return _remove(paths)
+
+
+def reapLeftovers():
+    """
+    reap the trash folders earlier sessions left behind, in the background
+    :return: DeleteResult
+    """
+    paths = []
+    trashes = []
+    for trash in _registered():
+        if not isTrash(trash):
+            continue
+        try:
+            names = os.listdir(trash)
+        except OSError:
+            continue
+        trashes.append(trash)
+        paths.extend(os.path.join(trash, n) for n in names)
+    return _reapInBackground(paths, trashes, prune=True)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  14:15
+# Email     : spirit_az@foxmail.com
+# File      : copyBackend.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import errno
+import hashlib
+import io
+import os
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+REFLINK = 'reflink'
+# copyFileVerified, reported like a backend in SyncStats
+HASHED = 'hashed'
+COPY_FILE_RANGE = 'copy_file_range'
+SENDFILE = 'sendfile'
+BUFFERED = 'buffered'
+
+CHUNK_SIZE = 1024 * 1024
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# errors meaning "this backend does not work between these two files", not "the copy failed"
+_UNSUPPORTED = set(getattr(errno, n) for n in ('EXDEV', 'EINVAL', 'ENOSYS', 'ENOTSUP', 'EOPNOTSUPP',
+                                               'ENOTTY', 'EBADF', 'EPERM')
+                   if hasattr(errno, n))
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _reflink(src, dst, size):
+    # shares the extents on btrfs / xfs, nothing is copied at all
+    try:
+        fcntl.ioctl(dst, FICLONE, src)
+    except (IOError, OSError) as e:
+        if e.errno in _UNSUPPORTED:
+            raise Unsupported(e)
+        raise
+
+
+def _copyFileRange(src, dst, size):
+    done = 0
+    while True:
+        try:
+            n = os.copy_file_range(src, dst, CHUNK_SIZE * 64)
+        except OSError as e:
+            if done == 0 and e.errno in _UNSUPPORTED:
+                raise Unsupported(e)
+            raise
+        if n == 0:
+            break
+        done += n
+    if done == 0 and size:
+        # some file systems (procfs, older nfs) answer 0 instead of an error
+        raise Unsupported('copy_file_range copied nothing')
+
+
+def _sendfile(src, dst, size):
+    offset = 0
+    while True:
+        try:
+            n = os.sendfile(dst, src, offset, CHUNK_SIZE * 64)
+        except OSError as e:
+            if offset == 0 and e.errno in _UNSUPPORTED:
+                raise Unsupported(e)
+            raise
+        if n == 0:
+            break
+        offset += n
+    if offset == 0 and size:
+        raise Unsupported('sendfile copied nothing')
+
+
+def _buffered(src, dst, size):
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    with os.fdopen(os.dup(src), 'rb', 0) as fsrc:
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            written = 0
+            while written < n:
+                written += os.write(dst, view[written:n])
+
+
+_BACKENDS = [(REFLINK, _reflink), (COPY_FILE_RANGE, _copyFileRange), (SENDFILE, _sendfile), (BUFFERED, _buffered)]
+
+
+def available():
+    """
+    backends this python on this os can try, fastest first
+    """
+    names = []
+    if sys.platform.startswith('linux'):
+        fcntl is not None and names.append(REFLINK)
+        hasattr(os, 'copy_file_range') and names.append(COPY_FILE_RANGE)
+        hasattr(os, 'sendfile') and names.append(SENDFILE)
+    names.append(BUFFERED)
+    return names
+
+
+_chosen = {}
+_lock = threading.Lock()
+
+
+def _fsKey(srcFd, dstFd):
+    return os.fstat(srcFd).st_dev, os.fstat(dstFd).st_dev
+
+
+def backendFor(sourceFile, targetDir):
+    """
+    backend picked for copies between these two file systems, None until one was copied
+    """
+    try:
+        return _chosen.get((os.stat(sourceFile).st_dev, os.stat(targetDir).st_dev))
+    except OSError:
+        return None
+
+
+def _sameFile(src, dst):
+    # python 2 has no os.path.samefile on windows, compare the paths there like shutil does
+    if hasattr(os.path, 'samefile'):
+        try:
+            return os.path.samefile(src, dst)
+        except OSError:
+            return False
+    return os.path.normcase(os.path.abspath(src)) == os.path.normcase(os.path.abspath(dst))
+
+
+def copyFile(sourceFile, targetFile):
+    """
+    copy the data of sourceFile to targetFile, like shutil.copyfile.
+    The first copy between two file systems tries the backends fastest first and remembers the one
+    that worked, later copies go straight to it.
+    :return: name of the backend used
+    """
+    if os.path.exists(targetFile) and _sameFile(sourceFile, targetFile):
+        raise IOError(errno.EINVAL, '%r and %r are the same file' % (sourceFile, targetFile))
+
+    names = available()
+    with open(sourceFile, 'rb') as fsrc:
+        with open(targetFile, 'wb') as fdst:
+            src, dst = fsrc.fileno(), fdst.fileno()
+            key = _fsKey(src, dst)
+            chosen = _chosen.get(key)
+            start = names.index(chosen) if chosen in names else 0
+            size = os.fstat(src).st_size
+            for name, func in _BACKENDS:
+                if name not in names[start:]:
+                    continue
+                try:
+                    func(src, dst, size)
+                except Unsupported:
+                    # rewind whatever a half working backend left behind
+                    os.lseek(src, 0, os.SEEK_SET)
+                    os.lseek(dst, 0, os.SEEK_SET)
+                    os.ftruncate(dst, 0)
+                    continue
+                if chosen != name:
+                    with _lock:
+                        _chosen[key] = name
+                return name
+    # BUFFERED never raises Unsupported
+    raise IOError(errno.EIO, 'no copy backend worked', sourceFile)
+
+
+# verified copy +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+def hashAlgorithm():
+    """
+    fastest hash available: xxhash when installed, blake2b on python 3.6+, sha1 otherwise
+    :return: (name, constructor)
+    """
+    if xxhash is not None:
+        if hasattr(xxhash, 'xxh3_64'):
+            return 'xxh3_64', xxhash.xxh3_64
+        return 'xxh64', xxhash.xxh64
+    if hasattr(hashlib, 'blake2b'):
+        return 'blake2b', hashlib.blake2b
+    return 'sha1', hashlib.sha1
+
+
+def _hasher(algo):
+    if algo is None:
+        return hashAlgorithm()
+    if algo.startswith('xx'):
+        new = getattr(xxhash, algo, None) if xxhash is not None else None
+    else:
+        new = getattr(hashlib, algo, None)
+    if new is None:
+        raise ValueError('hash %r is not available in this python' % algo)
+    return algo, new
+
+
+def hashAvailable(algo):
+    """
+    whether this python can compute algo, e.g. False for blake2b on python 2 or xxh3 without xxhash
+    """
+    try:
+        _hasher(algo)
+    except ValueError:
+        return False
+    return True
+
+
+def _stream(sourceFile, hasher, targetFile=None):
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    with io.open(sourceFile, 'rb', buffering=0) as fsrc:
+        fdst = io.open(targetFile, 'wb', buffering=0) if targetFile else None
+        try:
+            while True:
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                chunk = view[:n]
+                hasher.update(chunk)
+                if fdst is not None:
+                    written = 0
+                    while written < n:
+                        written += fdst.write(chunk[written:])
+        finally:
+            fdst is not None and fdst.close()
+
+
+def hashFile(sourceFile, algo=None):
+    """
+    :return: digest as 'algo:hex'
+    """
+    name, new = _hasher(algo)
+    hasher = new()
+    _stream(sourceFile, hasher)
+    return '%s:%s' % (name, hasher.hexdigest())
+
+
+def copyFileVerified(sourceFile, targetFile, algo=None, sidecar=False):
+    """
+    copy and hash in one read of the source, through one reusable buffer,
+    so the copy never has to be read back to know its checksum.
+    :param sourceFile:
+    :param targetFile:
+    :param algo: hash name, see hashAlgorithm for the default
+    :param sidecar: also write the digest to targetFile + '.' + algo
+    :return: digest as 'algo:hex'
+    """
+    if os.path.exists(targetFile) and _sameFile(sourceFile, targetFile):
+        raise IOError(errno.EINVAL, '%r and %r are the same file' % (sourceFile, targetFile))
+    name, new = _hasher(algo)
+    hasher = new()
+    _stream(sourceFile, hasher, targetFile)
+    digest = '%s:%s' % (name, hasher.hexdigest())
+    if sidecar:
+        writeSidecar(targetFile, digest)
+    return digest
+
+
+def writeSidecar(targetFile, digest):
+    """
+    '<hex>  <file name>' in targetFile.<algo>, the layout sha1sum -c reads
+    """
+    name, hexdigest = digest.split(':', 1)
+    with open('%s.%s' % (targetFile, name), 'w') as f:
+        f.write('%s  %s\n' % (hexdigest, os.path.basename(targetFile)))
+
+
+def readSidecar(targetFile, algo=None):
+    """
+    :return: digest as 'algo:hex', None when there is no sidecar
+    """
+    name = algo or hashAlgorithm()[0]
+    try:
+        with open('%s.%s' % (targetFile, name), 'r') as f:
+            return '%s:%s' % (name, f.read().split()[0])
+    except (IOError, OSError, IndexError):
+        return None
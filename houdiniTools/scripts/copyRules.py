@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  10:05
+# Email     : spirit_az@foxmail.com
+# File      : copyRules.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import json
+import os
+import re
+import threading
+
+from . import dirList
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+# the bulkDelete trash holds deleted trees until they are reaped, never copy them
+DEFAULT_EXCLUDE = ('.svn/', dirList.TRASH_NAME + '/')
+
+# handy exclude list for tool / render trees, not applied unless asked for
+SCRATCH_EXCLUDE = ('.svn/', '.git/', '__pycache__/', '*.pyc', '*.tmp', '*~', 'tmp/', 'temp/', 'scratch/',
+                   'backup/')
+
+_FLAGS = re.IGNORECASE if os.name == 'nt' else 0
+
+
+def translate(pattern):
+    """
+    glob pattern to regex source, matched against '/' separated paths relative to the copied folder.
+    *, ? and [...] stay inside one path part, ** crosses folders.
+    A pattern with a '/' in it (besides a trailing one) is anchored at the copied folder,
+    one without matches the name at any depth, like .gitignore.
+    """
+    anchored = '/' in pattern.rstrip('/')
+    pattern = pattern.strip('/')
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[' and pattern.find(']', i + 2) > 0:
+            j = pattern.find(']', i + 2)
+            chars = pattern[i + 1:j].replace('\\', '\\\\')
+            if chars.startswith('!'):
+                chars = '^' + chars[1:]
+            out.append('[%s]' % chars)
+            i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ('' if anchored else '(?:.*/)?') + ''.join(out) + r'\Z'
+
+
+def _compile(patterns):
+    if not patterns:
+        return None
+    return re.compile('|'.join('(?:%s)' % translate(p) for p in patterns), _FLAGS)
+
+
+class CopyRules(object):
+    """
+    include / exclude glob rules of one copy, compiled once into a regex per kind.
+    exclude: files and folders to leave out; a folder that matches is pruned with everything in it,
+             its contents are never listed. A trailing '/' makes a pattern match folders only.
+    include: when given, only files matching one of these are copied; folders are still walked.
+    """
+
+    def __init__(self, include=None, exclude=DEFAULT_EXCLUDE):
+        self.include = tuple(include or ())
+        self.exclude = tuple(exclude or ())
+        self._excludeAny = _compile([p for p in self.exclude if not p.endswith('/')])
+        self._excludeDir = _compile([p for p in self.exclude if p.endswith('/')])
+        self._include = _compile(self.include)
+
+    def pruneDir(self, rel):
+        """
+        :param rel: folder path relative to the copied folder, '/' separated
+        """
+        return bool(self._excludeDir and self._excludeDir.match(rel) or
+                    self._excludeAny and self._excludeAny.match(rel))
+
+    def wantFile(self, rel):
+        if self._excludeAny and self._excludeAny.match(rel):
+            return False
+        return self._include is None or bool(self._include.match(rel))
+
+    def toDict(self):
+        return {'include': list(self.include), 'exclude': list(self.exclude)}
+
+    @classmethod
+    def fromDict(cls, data):
+        return compileRules(data.get('include'), data.get('exclude', DEFAULT_EXCLUDE))
+
+    @classmethod
+    def load(cls, path):
+        """
+        rules of a json file: {"include": ["*.bgeo.sc"], "exclude": [".git/", "tmp/"]}
+        """
+        with open(path, 'r') as f:
+            return cls.fromDict(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=1)
+
+    def __repr__(self):
+        return '<CopyRules include=%r exclude=%r>' % (list(self.include), list(self.exclude))
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def compileRules(include=None, exclude=DEFAULT_EXCLUDE):
+    """
+    CopyRules of these patterns, compiled once per process
+    """
+    key = (tuple(include or ()), tuple(exclude or ()))
+    with _lock:
+        rules = _cache.get(key)
+        if rules is None:
+            rules = _cache[key] = CopyRules(*key)
+        return rules
+
+
+def asRules(rules):
+    """
+    CopyRules of None (the default, .svn excluded), a CopyRules, a {'include', 'exclude'} dict
+    or the path of a json rule file
+    """
+    if rules is None:
+        return compileRules()
+    if isinstance(rules, CopyRules):
+        return rules
+    if isinstance(rules, dict):
+        return CopyRules.fromDict(rules)
+    return CopyRules.load(rules)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  16:05
+# Email     : spirit_az@foxmail.com
+# File      : copyScheduler.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import io
+import os
+import threading
+import time
+
+from . import fileJob
+from . import fileSync
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+QUEUED = 'queued'
+RUNNING = 'running'
+PAUSED = 'paused'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+CHUNK_SIZE = 1024 * 1024
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class _Interrupted(Exception):
+    """
+    a background copy was paused or cancelled half way, the file is copied again on resume
+    """
+
+
+class TokenBucket(object):
+    """
+    bandwidth limit: rate bytes per second, bursts up to burst bytes. rate None means unlimited.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self._lock = threading.Lock()
+        self.setRate(rate, burst)
+
+    def setRate(self, rate, burst=None):
+        with self._lock:
+            self.rate = rate
+            self.burst = burst or rate or 0
+            self._tokens = self.burst
+            self._stamp = _clock()
+
+    def consume(self, n):
+        """
+        block until n bytes may pass
+        """
+        while n > 0:
+            with self._lock:
+                if not self.rate:
+                    return
+                now = _clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                # a chunk bigger than the bucket goes through in bucket sized pieces
+                take = min(n, self.burst)
+                if self._tokens >= take:
+                    self._tokens -= take
+                    n -= take
+                    continue
+                wait = (take - self._tokens) / float(self.rate)
+            time.sleep(wait)
+
+
+class ScheduledJob(object):
+    """
+    handle of a fileJob.FileJob given to the scheduler.
+    state is FAILED, with the exception in error, when planning or running the job raised
+    """
+
+    def __init__(self, job, priority, scheduler, planner=None):
+        """
+        :param job: fileJob.FileJob, None to plan it with planner() on the scheduler thread
+        """
+        self.job = job
+        self.priority = priority
+        self.error = None
+        self._planner = planner
+        self._scheduler = scheduler
+        self.state = QUEUED
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._finished = threading.Event()
+
+    def pause(self):
+        """
+        stop after the current chunk, the job keeps its place.
+        A background job drops the file it was copying and starts it again on resume.
+        """
+        if self.state in (QUEUED, RUNNING):
+            self._resumed.clear()
+            self.state = PAUSED
+            # the last waiting interactive job paused lets the background jobs go on
+            self._scheduler._wake(self)
+
+    def resume(self):
+        if self.state == PAUSED:
+            self.state = QUEUED
+            self._resumed.set()
+            self._scheduler._wake(self)
+
+    def _plan(self):
+        if self.job is None:
+            self.job = self._planner()
+            # cancelled while it was planned
+            self.state == CANCELLED and self.job.cancel()
+        return self.job
+
+    def cancel(self):
+        self.state = CANCELLED
+        self.job is not None and self.job.cancel()
+        self._resumed.set()
+        self._finished.set()
+        self._scheduler._wake(self)
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def wait(self, timeout=None):
+        """
+        :return: True when the job finished or was cancelled
+        """
+        return self._finished.wait(timeout)
+
+    def stats(self):
+        return fileSync.SyncStats() if self.job is None else self.job.stats()
+
+
+class CopyScheduler(object):
+    """
+    runs file jobs in the background with two priority classes.
+    Interactive jobs run unthrottled on their own thread; background jobs share a token bucket
+    and hold still, chunk by chunk, while any interactive job is waiting or running,
+    so a long sync does not starve cache loads in the viewport.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.bucket = TokenBucket(rate, burst)
+        self._queues = {INTERACTIVE: [], BACKGROUND: []}
+        self._threads = {}
+        self._cond = threading.Condition()
+        self._interactiveIdle = threading.Event()
+        self._interactiveIdle.set()
+        self._stopped = False
+
+    def setRate(self, rate, burst=None):
+        self.bucket.setRate(rate, burst)
+
+    def submit(self, job, priority=BACKGROUND, planner=None):
+        """
+        :param job: fileJob.FileJob, None with a planner
+        :param priority: INTERACTIVE or BACKGROUND
+        :param planner: planner() -> fileJob.FileJob, run on the scheduler thread, so a big tree is not
+                        walked on the caller's (UI) thread
+        :return: ScheduledJob
+        """
+        handle = ScheduledJob(job, priority, self, planner)
+        with self._cond:
+            self._queues[priority].append(handle)
+            if priority == INTERACTIVE:
+                self._interactiveIdle.clear()
+            if priority not in self._threads:
+                t = threading.Thread(target=self._worker, args=(priority,), name='copyScheduler-%s' % priority)
+                t.daemon = True
+                self._threads[priority] = t
+                t.start()
+            self._cond.notify_all()
+        return handle
+
+    def submitCopy(self, sourceDir, targetDir, priority=BACKGROUND, journal=None, rules=None):
+        """
+        queue a copyFiles job, planned once its turn comes.
+        The journal is named after the copy by default, submitting it again after a crash resumes it
+        """
+        args = (sourceDir, targetDir, rules)
+        journal = journal or fileJob.journalFor(fileJob.planCopyFiles, args)
+        return self.submit(None, priority, lambda: fileJob.FileJob.open(journal, fileJob.planCopyFiles, *args))
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _wake(self, handle):
+        with self._cond:
+            if handle.priority == INTERACTIVE and handle.state == QUEUED:
+                self._interactiveIdle.clear()
+            self._cond.notify_all()
+
+    def _next(self, priority):
+        queue = self._queues[priority]
+        with self._cond:
+            while not self._stopped:
+                queue[:] = [h for h in queue if h.state not in (DONE, CANCELLED, FAILED)]
+                if priority == INTERACTIVE and all(h.paused for h in queue):
+                    self._interactiveIdle.set()
+                for handle in queue:
+                    if not handle.paused:
+                        handle.state = RUNNING
+                        return handle
+                self._cond.wait()
+        return None
+
+    def _copier(self, handle):
+        if handle.priority == INTERACTIVE:
+            return None
+
+        def throttled(sourceFile, targetFile):
+            st = os.stat(sourceFile)
+            buf = bytearray(CHUNK_SIZE)
+            view = memoryview(buf)
+            with io.open(sourceFile, 'rb', buffering=0) as fsrc:
+                with io.open(targetFile, 'wb', buffering=0) as fdst:
+                    while True:
+                        self._interactiveIdle.wait()
+                        if handle.paused or handle.job.cancelled:
+                            raise _Interrupted()
+                        n = fsrc.readinto(buf)
+                        if not n:
+                            break
+                        self.bucket.consume(n)
+                        written = 0
+                        while written < n:
+                            written += fdst.write(view[written:n])
+            os.utime(targetFile, (st.st_atime, st.st_mtime))
+            return st.st_size
+
+        return throttled
+
+    def _worker(self, priority):
+        while True:
+            handle = self._next(priority)
+            if handle is None:
+                return
+            try:
+                self._run(handle)
+            except Exception as e:
+                # the thread goes on, the jobs queued after a broken one still run
+                handle.error = e
+                handle.state = FAILED
+                handle._finished.set()
+
+    def _run(self, handle):
+        job = handle._plan()
+        copier = self._copier(handle)
+        priority = handle.priority
+        try:
+            for index in job.pending():
+                if handle.paused or job.cancelled:
+                    break
+                if priority == BACKGROUND:
+                    self._interactiveIdle.wait()
+                job.runOne(index, copier)
+        except _Interrupted:
+            pass
+        finally:
+            job.close()
+        if job.finished or job.cancelled:
+            if job.finished and not job.errors:
+                job.discardJournal()
+            if handle.state != CANCELLED:
+                handle.state = DONE
+            handle._finished.set()
+        elif handle.state == RUNNING:
+            # only failed operations are left
+            handle.state = DONE
+            handle._finished.set()
+
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def getScheduler():
+    """
+    session wide scheduler, unthrottled until setRate is called
+    """
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = CopyScheduler()
+        return _scheduler
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  16:40
+# Email     : spirit_az@foxmail.com
+# File      : dedup.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import os
+import sqlite3
+import tempfile
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+
+
+def pathKey(path):
+    """
+    key for file paths: '\\' and '/' are the same, letter case is ignored
+    """
+    return path.replace('\\', '/').lower()
+
+
+class SpillSet(object):
+    """
+    set that keeps at most maxItems keys in memory and moves them to a temporary sqlite file past that.
+    Keys have to be strings or numbers.
+    """
+
+    def __init__(self, maxItems):
+        self.maxItems = maxItems
+        self._mem = set()
+        self._db = None
+        self._dbPath = None
+
+    def _spill(self):
+        if self._db is None:
+            fd, self._dbPath = tempfile.mkstemp(prefix='dedup', suffix='.sqlite')
+            os.close(fd)
+            self._db = sqlite3.connect(self._dbPath)
+            self._db.execute('PRAGMA journal_mode=OFF')
+            self._db.execute('PRAGMA synchronous=OFF')
+            self._db.execute('CREATE TABLE seen (k PRIMARY KEY) WITHOUT ROWID')
+        self._db.executemany('INSERT OR IGNORE INTO seen VALUES (?)', ((k,) for k in self._mem))
+        self._mem.clear()
+
+    def __contains__(self, key):
+        if key in self._mem:
+            return True
+        if self._db is None:
+            return False
+        return self._db.execute('SELECT 1 FROM seen WHERE k = ?', (key,)).fetchone() is not None
+
+    def add(self, key):
+        self._mem.add(key)
+        if len(self._mem) >= self.maxItems:
+            self._spill()
+
+    def close(self):
+        self._mem.clear()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            os.remove(self._dbPath)
+
+
+def iterUnique(iterable, key=None, maxItems=None):
+    """
+    yield the items of iterable once each, in first seen order, without building a list
+    :param iterable:
+    :param key: function giving the value two items are compared by, e.g. pathKey
+    :param maxItems: keep at most this many keys in memory and spill the rest to disk,
+                     for inputs whose distinct keys do not fit in memory
+    """
+    seen = set() if maxItems is None else SpillSet(maxItems)
+    try:
+        for item in iterable:
+            k = item if key is None else key(item)
+            if k in seen:
+                continue
+            seen.add(k)
+            yield item
+    finally:
+        if maxItems is not None:
+            seen.close()
+
+
+def unique(iterable, key=None):
+    """
+    items of iterable without duplicates, first seen order kept, linear time
+    """
+    return list(iterUnique(iterable, key))
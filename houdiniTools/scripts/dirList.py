@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  15:10
+# Email     : spirit_az@foxmail.com
+# File      : dirList.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import collections
+import os
+import sys
+import threading
+import time
+
+try:
+    # python 3.5+
+    from os import scandir, walk
+except ImportError:
+    try:
+        from scandir import scandir, walk
+    except ImportError:
+        # the backport shipped with mayaTools
+        sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                     'mayaTools', 'scripts', 'site-packages'))
+        from scandir import scandir, walk
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+Entry = collections.namedtuple('Entry', 'name path is_dir is_file size mtime')
+
+# a folder changed within this many seconds may change again without its mtime moving
+# (1s on ext3/nfs, 2s on fat), such listings are not cached
+RACY_SECONDS = 2.0
+
+# folder bulkDelete renames deleted trees into, left out of every listing until it is reaped
+TRASH_NAME = '.mclTrash'
+
+
+def listEntries(filepath, withStat=True):
+    """
+    list a folder in one directory read.
+    is_dir / is_file come from the directory read itself on windows and on linux file systems
+    reporting d_type; size / mtime need a stat on linux, so pass withStat=False when only names
+    and types are wanted and they are left as None. The bulkDelete trash is left out.
+    :param filepath: folder to list, OSError when it does not exist
+    :param withStat: fill size and mtime
+    :return: [Entry, ...] in directory order
+    """
+    entries = []
+    for e in scandir(filepath):
+        if e.name == TRASH_NAME:
+            continue
+        try:
+            is_dir = e.is_dir()
+            is_file = not is_dir and e.is_file()
+        except OSError:
+            is_dir = is_file = False
+        size = mtime = None
+        if withStat:
+            try:
+                st = e.stat()
+                size, mtime = st.st_size, st.st_mtime
+            except OSError:
+                # dangling link
+                pass
+        entries.append(Entry(e.name, e.path, is_dir, is_file, size, mtime))
+    return entries
+
+
+def statSignature(st):
+    """
+    what tells two stats of the same folder apart, mtime at the best precision the os gives
+    """
+    return getattr(st, 'st_mtime_ns', st.st_mtime), st.st_ino, st.st_dev
+
+
+class ListingCache(object):
+    """
+    process wide cache of folder listings (names and types only, no stat).
+    Every lookup stats the folder itself and reuses the listing while its mtime / inode is unchanged,
+    least recently used folders are dropped past maxsize.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(filepath):
+        return os.path.normcase(os.path.abspath(filepath))
+
+    def entries(self, filepath):
+        """
+        :return: tuple of Entry, OSError when the folder does not exist
+        """
+        key = self._key(filepath)
+        st = os.stat(filepath)
+        sig = statSignature(st)
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None and item[0] == sig:
+                self._data[key] = item
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+
+        entries = tuple(listEntries(filepath, withStat=False))
+        if time.time() - st.st_mtime > RACY_SECONDS:
+            with self._lock:
+                self._data[key] = (sig, entries)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return entries
+
+    def invalidate(self, filepath):
+        with self._lock:
+            self._data.pop(self._key(filepath), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+_cache = ListingCache()
+
+
+def invalidate(filepath):
+    """
+    drop one folder from the listing cache, e.g. right after writing into it
+    """
+    _cache.invalidate(filepath)
+
+
+def clearCache():
+    _cache.clear()
+
+
+def setCacheSize(maxsize):
+    _cache.maxsize = maxsize
+
+
+def listNames(filepath, mothon=None, cached=True):
+    """
+    :param filepath:
+    :param mothon: 'dir', 'file' or None for every entry
+    :param cached: go through the process wide ListingCache
+    :return: sorted names, [] when the folder does not exist
+    """
+    try:
+        if cached:
+            entries = _cache.entries(filepath)
+        else:
+            entries = listEntries(filepath, withStat=False)
+    except OSError:
+        return []
+    if mothon == 'dir':
+        names = [e.name for e in entries if e.is_dir]
+    elif mothon == 'file':
+        names = [e.name for e in entries if e.is_file]
+    else:
+        names = [e.name for e in entries]
+    names.sort()
+    return names
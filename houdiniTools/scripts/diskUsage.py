@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  10:35
+# Email     : spirit_az@foxmail.com
+# File      : diskUsage.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import collections
+import errno
+import os
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from . import copyRules
+from . import dirList
+from . import fileSync
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+DEFAULT_WORKERS = 8
+
+# files of one folder: {name: (size, mtime)}; sub folders: [name, ...] walk descends into
+_Listing = collections.namedtuple('_Listing', 'files dirs bytes')
+
+CopyPlan = collections.namedtuple('CopyPlan', 'files bytes needed skipped')
+
+
+class NotEnoughSpace(IOError):
+    """
+    raised by the preflight check before a copy starts
+    """
+
+    def __init__(self, plan, free):
+        IOError.__init__(self, errno.ENOSPC, 'copy needs %.1f MB, only %.1f MB free' % (
+            plan.needed / 1048576.0, free / 1048576.0))
+        self.plan = plan
+        self.free = free
+
+
+class SpaceWarning(UserWarning):
+    pass
+
+
+class DirCache(object):
+    """
+    listings with file sizes of the folders scanned so far, reused while a folder's mtime / inode is
+    unchanged, so planning the same tree again only lists the folders that changed.
+    A file rewritten in place does not move its folder's mtime: its new size is seen once the folder
+    changes or the cache is cleared, good enough for a space estimate.
+    """
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def listing(self, folder):
+        """
+        :return: _Listing, OSError when the folder does not exist
+        """
+        key = os.path.normcase(os.path.abspath(folder))
+        st = os.stat(folder)
+        sig = dirList.statSignature(st)
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None and item[0] == sig:
+                self._data[key] = item
+                return item[1]
+
+        files = {}
+        dirs = []
+        for e in dirList.scandir(folder):
+            try:
+                if e.is_dir():
+                    # like dirList.walk, links to folders are not followed
+                    e.is_symlink() or dirs.append(e.name)
+                    continue
+                fst = e.stat()
+            except OSError:
+                continue
+            files[e.name] = (fst.st_size, fst.st_mtime)
+        result = _Listing(files, dirs, sum(size for size, mtime in files.values()))
+        if time.time() - st.st_mtime > dirList.RACY_SECONDS:
+            with self._lock:
+                self._data[key] = (sig, result)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = DirCache()
+
+
+def clearCache():
+    _cache.clear()
+
+
+def _tryListing(folder):
+    try:
+        return _cache.listing(folder)
+    except OSError:
+        return None
+
+
+def scanTree(root, workers=DEFAULT_WORKERS, prune=None):
+    """
+    list a tree level by level, the folders of one level in parallel
+    :param root:
+    :param workers: listing threads, scandir / stat wait on the disk and release the GIL
+    :param prune: prune(relative folder) True for sub folders to leave out
+    :return: {relative folder ('' for root, '/' separators): _Listing}
+    """
+    tree = {}
+    pool = ThreadPool(workers)
+    try:
+        level = ['']
+        while level:
+            listings = pool.map(_tryListing, [os.path.join(root, rel) for rel in level])
+            nextLevel = []
+            for rel, listing in zip(level, listings):
+                if listing is None:
+                    continue
+                tree[rel] = listing
+                subs = [rel + '/' + d if rel else d for d in listing.dirs]
+                nextLevel.extend(sub for sub in subs if not (prune and prune(sub)))
+            level = nextLevel
+    finally:
+        pool.close()
+        pool.join()
+    return tree
+
+
+def treeBytes(root, workers=DEFAULT_WORKERS):
+    """
+    total size of the files under root
+    """
+    return sum(listing.bytes for listing in scanTree(root, workers).values())
+
+
+def planCopy(sourceDir, targetDir, workers=DEFAULT_WORKERS, rules=None):
+    """
+    what copyFiles would copy now, without touching a file: the source is compared with one
+    listing per target folder, files with the same size and mtime are skipped like copyFiles does
+    :param rules: include / exclude rules, see fileSync.iterSource
+    :return: CopyPlan(files, bytes to copy, bytes the target grows by, files skipped)
+    """
+    rules = copyRules.asRules(rules)
+    source = scanTree(sourceDir, workers, prune=rules.pruneDir)
+    rels = sorted(source)
+    pool = ThreadPool(workers)
+    try:
+        targets = pool.map(_tryListing, [os.path.join(targetDir, rel) for rel in rels])
+    finally:
+        pool.close()
+        pool.join()
+
+    files = size = needed = skipped = 0
+    for rel, target in zip(rels, targets):
+        existing = target.files if target is not None else {}
+        for name, (fsize, mtime) in source[rel].files.items():
+            if not rel and name == fileSync.MANIFEST_NAME or not rules.wantFile(rel + '/' + name if rel else name):
+                continue
+            old = existing.get(name)
+            if fileSync.sameStat(fsize, mtime, old):
+                skipped += 1
+                continue
+            files += 1
+            size += fsize
+            # an overwritten file gives its old blocks back
+            needed += fsize - (old[0] if old else 0)
+    return CopyPlan(files, size, max(needed, 0), skipped)
+
+
+def existingParent(path):
+    """
+    path or its nearest existing parent, where the free space of a not yet created target is read
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
@@ -6,8 +6,9 @@
 __author__ = 'miaochenliang'
 
 # import--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-import xml
+import collections
 import cStringIO
+import weakref
 import hou
 
 from PySide2.QtGui import *
@@ -19,6 +20,8 @@ try:
 except:
     import shiboken2 as sip
 
+from . import uiCache
+
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 def getMainWindow():
@@ -33,6 +36,51 @@ def getStyleSheet():
     return hou.qt.styleSheet()
 
 
+# live tool windows by object name -> weakref, an entry goes with the destroyed signal of its window.
+# kept over a reload of this module, openUI reloads it on import
+try:
+    _windows
+except NameError:
+    _windows = {}
+
+
+def _dropWindow(Name, ref):
+    # only the window registered last under the name, a new one may have taken it already
+    if _windows.get(Name) is ref:
+        del _windows[Name]
+
+
+def registerWindow(widget, Name=None):
+    """
+    make widget found by name without searching the main window, see UIExists
+    :param Name: object name, widget.objectName() by default
+    :return: widget
+    """
+    Name = Name or widget.objectName()
+    ref = weakref.ref(widget)
+    _windows[Name] = ref
+    widget.destroyed.connect(lambda *args: _dropWindow(Name, ref))
+    return widget
+
+
+def findWindow(qtType, Name):
+    """
+    the window of the name, None when there is none.
+    a dict lookup for registered windows, findChild over the main window whenever that misses:
+    windows not made through registerWindow, e.g. by another tool, are found all the same
+    """
+    ref = _windows.get(Name)
+    if ref is not None:
+        widget = ref()
+        if widget is not None and sip.isValid(widget) and isinstance(widget, qtType):
+            return widget
+        if widget is None or not sip.isValid(widget):
+            # the python wrapper went while the window may live on: search for it
+            _dropWindow(Name, ref)
+    widget = getMainWindow().findChild(qtType, Name)
+    return registerWindow(widget, Name) if widget else None
+
+
 def UIExists(qtType, Name, AsBool=True):
     """
     exists ui by name
@@ -41,8 +89,7 @@ def UIExists(qtType, Name, AsBool=True):
     :return:
     """
 
-    mainUI = getMainWindow()  # type: QMainWindow
-    allC = mainUI.findChild(qtType, Name)
+    allC = findWindow(qtType, Name)
     if allC:
         return True if AsBool else allC
     else:
@@ -62,25 +109,39 @@ def deleteUI(qtType, Name):
     sip.delete(panetab)
 
 
-def loadUi(uiPath):
+def raiseUI(qtType, Name):
     """
-    read an ui file, get two classes to return..
+    bring the window of the name to the front
+    :return: the window, False when there is none
     """
-    parsed = xml.etree.ElementTree.parse(uiPath)
-    widget_class = parsed.find('widget').get('class')
-    form_class = parsed.find('class').text
+    widget = findWindow(qtType, Name)
+    if not widget:
+        return False
+    widget.show()
+    widget.raise_()
+    widget.activateWindow()
+    return widget
 
+
+def _compileUi(uiPath):
     with open(uiPath, 'r') as f:
         o = cStringIO.StringIO()
-        frame = dict()
-
         uic.compileUi(f, o, indent=0)
+    return o.getvalue()
+
+
+def loadUi(uiPath):
+    """
+    read an ui file, get two classes to return..
+    the compiled form is cached on disk by uiCache, only an edited .ui is compiled again
+    """
+    widget_class, form_class, pyc = uiCache.loadCompiled(uiPath, _compileUi, uiCache.uicVersion(uic))
 
-        pyc = compile(o.getvalue(), '<string>', 'exec')
-        exec pyc in frame
+    frame = dict()
+    exec pyc in frame
 
-        form_class = frame['Ui_%s' % form_class]
-        base_class = eval(widget_class)
+    form_class = frame['Ui_%s' % form_class]
+    base_class = eval(widget_class)
 
     return form_class, base_class
 
@@ -91,6 +152,7 @@ class mSplashScreen(QSplashScreen):
     def __init__(self, animation, flag):
         super(mSplashScreen, self).__init__(QPixmap(), flag)
         self.setObjectName('mSplashScreen')
+        registerWindow(self)
         self.movie = QMovie(animation)
         self.movie.setParent(self)
         self.movie.frameChanged.connect(self.onNextFrame)
@@ -117,6 +179,7 @@ class mSplashScreen_new(QSplashScreen):
     def __init__(self, animation, flag, widget):
         super(mSplashScreen_new, self).__init__(QPixmap(), flag)
         self.setObjectName('mSplashScreen')
+        registerWindow(self)
         self.movie = QMovie(animation)
         self.movie.setParent(self)
         self.movie.frameChanged.connect(self.onNextFrame)
@@ -140,3 +203,110 @@ class mSplashScreen_new(QSplashScreen):
         weight.show()
         self.movie.stop()
         deleteUI(QSplashScreen, 'mSplashScreen')
+
+
+# startup --+----+----+----+----+----+----+----+----+----+----+----+----+----+----+----+----+----+----+----+----+----#
+# called when a tool became interactive: func(name, ms, steps), steps [(step name, ms), ...]
+# kept over a reload of this module like the registered windows, hooks are added once per session
+try:
+    startupHooks
+except NameError:
+    startupHooks = []
+
+
+def addStartupHook(func):
+    """
+    report the time to interactive of every tool start, e.g. to a log or perfTrace
+    """
+    startupHooks.append(func)
+    return func
+
+
+class mStartupPipeline(QObject):
+    """
+    builds a tool window in steps, one per turn of the event loop off a zero interval timer,
+    so the splash keeps animating in between and closes as soon as the window is shown.
+        pipe = mStartupPipeline('tool name', splash)
+        pipe.add(buildForm).add(makeWindow, window=True)
+        pipe.start()
+    """
+    interactive = Signal(float)
+
+    # running pipelines, so one is not collected before its last step
+    _running = set()
+
+    def __init__(self, name, splash=None, minDisplay=0, parent=None):
+        """
+        :param minDisplay: ms the splash stays at least, 0 closes it as soon as the window is ready
+        """
+        super(mStartupPipeline, self).__init__(parent)
+        self.name = name
+        self.splash = splash
+        self.minDisplay = minDisplay
+        self.window = None
+        self.steps = []
+        self.times = []
+        self.tti = None
+        self._queue = collections.deque()
+        self._clock = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._next)
+
+    def add(self, func, name=None, window=False):
+        """
+        :param window: func returns the window the splash finishes on
+        """
+        self.steps.append((name or func.__name__, func, window))
+        return self
+
+    def start(self):
+        self._clock.start()
+        self._queue.extend(self.steps)
+        mStartupPipeline._running.add(self)
+        self.splash and self.splash.show()
+        self._timer.start()
+        return self
+
+    def _next(self):
+        if not self._queue:
+            self._timer.stop()
+            remaining = self.minDisplay - self._clock.elapsed()
+            if remaining > 0:
+                QTimer.singleShot(remaining, self._ready)
+            else:
+                self._ready()
+            return
+        name, func, window = self._queue.popleft()
+        t = QElapsedTimer()
+        t.start()
+        try:
+            result = func()
+        except Exception:
+            self._stop()
+            raise
+        self.times.append((name, t.elapsed()))
+        if window:
+            self.window = result
+
+    def _ready(self):
+        if self.splash:
+            # mSplashScreen.finish shows the window
+            self.splash.finish(self.window)
+        elif self.window is not None:
+            self.window.show()
+        # the window is painted once the loop gets back here
+        QTimer.singleShot(0, self._interactive)
+
+    def _interactive(self):
+        self.tti = self._clock.elapsed()
+        mStartupPipeline._running.discard(self)
+        self.interactive.emit(float(self.tti))
+        for hook in list(startupHooks):
+            hook(self.name, self.tti, list(self.times))
+
+    def _stop(self):
+        self._timer.stop()
+        self._queue.clear()
+        self.splash and self.splash.close()
+        mStartupPipeline._running.discard(self)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  09:50
+# Email     : spirit_az@foxmail.com
+# File      : fileJob.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import errno
+import hashlib
+import json
+import os
+import threading
+
+from . import dirList
+from . import fileSync
+from . import userDirs
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+COPY = 'copy'
+REMOVE = 'remove'
+RMDIR = 'rmdir'
+
+
+def journalDir():
+    """
+    per user: a journal is run as it is found, one planted by somebody else must never be
+    """
+    return userDirs.userDir('fileJobs')
+
+
+def planSignature(planner, args):
+    """
+    what a journal was planned for, a journal is only resumed by the same planner over the same paths
+    """
+    return [planner.__name__] + [os.path.normcase(os.path.abspath(a)) if isinstance(a, _STRINGS) else repr(a)
+                                 for a in args]
+
+
+_STRINGS = (str, type(u''))
+
+
+def journalFor(planner, args):
+    """
+    journal path of one plan in journalDir, the same plan started again resumes it
+    """
+    key = hashlib.sha1(repr(planSignature(planner, args)).encode('utf-8')).hexdigest()
+    return os.path.join(journalDir(), '%s_%s.journal' % (planner.__name__, key)).replace('\\', '/')
+
+
+def _ignoreMissing(func, path):
+    try:
+        func(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+class FileJob(object):
+    """
+    list of file operations [(op, source, target), ...] run with an append-only journal.
+    The journal starts with the planned operations and gets one line per finished one,
+    so a job killed half way (crash, cancel) resumes from the first operation not finished.
+    Every operation may be run twice after a crash, they are all idempotent.
+
+    Progress goes to callbacks(done, total, operation) after every operation, from the thread
+    running the job; Qt UIs should forward it through a signal.
+    """
+
+    def __init__(self, journalPath, ops, signature=None):
+        self.journalPath = journalPath
+        self.ops = [tuple(op) for op in ops]
+        self.signature = signature
+        self.done = set()
+        self.bytes = 0
+        self.errors = []
+        self.callbacks = []
+        self._cancel = threading.Event()
+        self._journal = None
+
+    # journal --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+    @classmethod
+    def load(cls, journalPath):
+        """
+        job of an existing journal with its finished operations, None when there is no journal
+        """
+        try:
+            with open(journalPath, 'r') as f:
+                lines = f.read().splitlines()
+        except (IOError, OSError):
+            return None
+        try:
+            header = json.loads(lines[0])
+            job = cls(journalPath, header['ops'], header.get('signature'))
+        except (IndexError, ValueError, KeyError):
+            return None
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # the line being written when the process died
+                continue
+            if 'done' in record:
+                job.done.add(record['done'])
+        return job
+
+    @classmethod
+    def open(cls, journalPath, planner, *args):
+        """
+        resume the job of journalPath, or plan a new one with planner(*args) when there is none
+        or the journal was planned for something else, e.g. by an earlier session of the same pid
+        """
+        signature = planSignature(planner, args)
+        job = cls.load(journalPath)
+        if job is None or job.signature != signature:
+            job = cls(journalPath, planner(*args), signature)
+            job._writePlan()
+        return job
+
+    def _writePlan(self):
+        folder = os.path.dirname(self.journalPath)
+        folder and fileSync.makeDirs(folder)
+        with open(self.journalPath, 'w') as f:
+            f.write(json.dumps({'ops': self.ops, 'signature': self.signature}) + '\n')
+
+    def _record(self, **kwargs):
+        if self._journal is None:
+            self._journal = open(self.journalPath, 'a')
+        self._journal.write(json.dumps(kwargs) + '\n')
+        self._journal.flush()
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def discardJournal(self):
+        self.close()
+        _ignoreMissing(os.remove, self.journalPath)
+
+    # run --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+    @property
+    def total(self):
+        return len(self.ops)
+
+    @property
+    def finished(self):
+        return len(self.done) == len(self.ops)
+
+    def cancel(self):
+        """
+        stop after the running operation, the journal keeps what is left for a resume
+        """
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def pending(self):
+        return [i for i in range(len(self.ops)) if i not in self.done]
+
+    def execute(self, op, copier=None):
+        """
+        run one operation
+        :param copier: copier(source, target) used for COPY, fileSync.copyWithStat by default
+        :return: bytes copied
+        """
+        kind, source, target = op
+        if kind == COPY:
+            fileSync.makeDirs(os.path.dirname(target))
+            size = (copier or fileSync.copyWithStat)(source, target)
+            return size[0] if isinstance(size, tuple) else size
+        if kind == REMOVE:
+            _ignoreMissing(os.remove, target)
+        elif kind == RMDIR:
+            _ignoreMissing(os.rmdir, target)
+        return 0
+
+    def runOne(self, index, copier=None):
+        op = self.ops[index]
+        try:
+            self.bytes += self.execute(op, copier)
+        except (IOError, OSError) as e:
+            self.errors.append((op, e))
+            self._record(error=index, message=str(e))
+        else:
+            self.done.add(index)
+            self._record(done=index)
+        for callback in self.callbacks:
+            callback(len(self.done), self.total, op)
+
+    def run(self, copier=None):
+        """
+        run every operation not finished yet.
+        The journal is removed when all of them succeeded and kept otherwise.
+        :return: fileSync.SyncStats, copied counts the finished operations
+        """
+        self._cancel.clear()
+        try:
+            for index in self.pending():
+                if self.cancelled:
+                    break
+                self.runOne(index, copier)
+        finally:
+            self.close()
+        if self.finished:
+            self.discardJournal()
+        return self.stats()
+
+    def stats(self):
+        stats = fileSync.SyncStats()
+        stats.copied = len(self.done)
+        stats.skipped = len(self.ops) - len(self.done) - len(self.errors)
+        stats.bytes = self.bytes
+        stats.errors = [(op[1] or op[2], e) for op, e in self.errors]
+        return stats
+
+
+# planners +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+def planCopyFiles(sourceDir, targetDir, rules=None):
+    """
+    copy of every file copyFiles would copy now, unchanged files are left out
+    """
+    ops = []
+    for sourceFile, rel in fileSync.iterSource(sourceDir, rules):
+        targetFile = os.path.join(targetDir, rel)
+        try:
+            st, tst = os.stat(sourceFile), os.stat(targetFile)
+            if fileSync.sameStat(st.st_size, st.st_mtime, [tst.st_size, tst.st_mtime]):
+                continue
+        except OSError:
+            pass
+        ops.append((COPY, sourceFile, targetFile))
+    return ops
+
+
+def planCoverFiles(sourceDir, targetDir):
+    ops = []
+    for name in sorted(os.listdir(sourceDir)):
+        sourceFile = os.path.join(sourceDir, name)
+        if os.path.isfile(sourceFile):
+            ops.append((COPY, sourceFile, os.path.join(targetDir, name)))
+    return ops
+
+
+def planRemoveFileInFirstDir(targetDir):
+    return [(REMOVE, None, os.path.join(targetDir, name)) for name in sorted(os.listdir(targetDir))
+            if os.path.isfile(os.path.join(targetDir, name))]
+
+
+def planRemoveDir(targetDir):
+    """
+    every file, then its folder, deepest folders first, so each step is one small resumable delete
+    """
+    ops = []
+    for root, subDirs, files in dirList.walk(targetDir, topdown=False):
+        ops.extend((REMOVE, None, os.path.join(root, f)) for f in files)
+        # links to folders are removed like files, walk never follows them
+        ops.extend((REMOVE, None, os.path.join(root, d)) for d in subDirs if os.path.islink(os.path.join(root, d)))
+        ops.append((RMDIR, None, root))
+    return ops
+
+
+def runJob(journalPath, planner, args, callback=None):
+    """
+    resume or start the job of journalPath and run it
+    :return: fileSync.SyncStats
+    """
+    job = FileJob.open(journalPath, planner, *args)
+    callback and job.callbacks.append(callback)
+    return job.run()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  10:20
+# Email     : spirit_az@foxmail.com
+# File      : fileSync.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import errno
+import json
+import os
+from multiprocessing.pool import ThreadPool
+
+from . import copyBackend
+from . import copyRules
+from . import dirList
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+MANIFEST_NAME = '.syncManifest.json'
+DEFAULT_WORKERS = 8
+
+# per file results
+COPIED = 'copied'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+class SyncStats(object):
+    """
+    result of one sync run
+    """
+
+    def __init__(self):
+        self.copied = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.errors = []
+        # copy backend name: number of files it copied
+        self.backends = {}
+
+    def add(self, result):
+        status, sourceFile, value = result[:3]
+        if status == COPIED:
+            self.copied += 1
+            self.bytes += value
+            backend = result[5]
+            self.backends[backend] = self.backends.get(backend, 0) + 1
+        elif status == SKIPPED:
+            self.skipped += 1
+        else:
+            self.errors.append((sourceFile, value))
+
+    def check(self):
+        """
+        raise SyncError when any file failed
+        """
+        if self.errors:
+            raise SyncError(self.errors)
+
+    def __repr__(self):
+        return '<SyncStats copied=%d skipped=%d bytes=%d errors=%d backends=%r>' % (
+            self.copied, self.skipped, self.bytes, len(self.errors), self.backends)
+
+
+class SyncError(IOError):
+    """
+    raised by SyncStats.check, errors are (source file, exception) in walk order
+    """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        lines = ['%s: %s' % (f, e) for f, e in self.errors[:10]]
+        if len(self.errors) > 10:
+            lines.append('... %d more' % (len(self.errors) - 10))
+        super(SyncError, self).__init__('%d file(s) failed to copy\n%s' % (len(self.errors), '\n'.join(lines)))
+
+
+class Manifest(object):
+    """
+    size and mtime of every file copied into a target, stored as json in the target root.
+    Keys are paths relative to the target root, always with '/'.
+    """
+
+    def __init__(self, targetDir, name=MANIFEST_NAME):
+        self.path = os.path.join(targetDir, name)
+        self.entries = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.entries = {}
+        return self
+
+    def get(self, rel):
+        return self.entries.get(rel)
+
+    def set(self, rel, size, mtime, digest=None):
+        self.entries[rel] = [size, mtime, digest] if digest else [size, mtime]
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        folder = os.path.dirname(self.path)
+        os.path.exists(folder) or os.makedirs(folder)
+        tmp = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        replaceFile(tmp, self.path)
+        self.dirty = False
+
+
+# +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+def replaceFile(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # python 2 has no os.replace, and os.rename will not overwrite on windows
+        os.path.exists(dst) and os.remove(dst)
+        os.rename(src, dst)
+
+
+def sameStat(size, mtime, record):
+    """
+    mtime is compared in whole seconds, the same precision copyFiles always used
+    """
+    return record is not None and record[0] == size and int(record[1]) == int(mtime)
+
+
+def makeDirs(folder):
+    """
+    os.makedirs that tolerates another worker creating the same folder
+    """
+    try:
+        os.makedirs(folder)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(folder):
+            raise
+
+
+def _raise(error):
+    raise error
+
+
+def iterSource(sourceDir, rules=None, onerror=None):
+    """
+    yield (source file, target relative path) for every file of sourceDir the rules let through
+    :param sourceDir: raises OSError right away when it is missing, e.g. an unmounted share
+    :param rules: copyRules.CopyRules or anything copyRules.asRules takes, .svn folders are left out by default.
+                  Excluded folders are pruned before the walk lists them.
+    :param onerror: onerror(OSError) for a folder that cannot be listed, the error is raised by default
+    """
+    if not os.path.isdir(sourceDir):
+        raise OSError(errno.ENOENT, 'source folder not found', sourceDir)
+    return _iterSource(sourceDir, copyRules.asRules(rules), onerror or _raise)
+
+
+def _iterSource(sourceDir, rules, onerror):
+    for root, dirs, files in dirList.walk(sourceDir, onerror=onerror):
+        relDir = os.path.relpath(root, sourceDir)
+        if relDir == os.curdir:
+            relPrefix = ''
+            files = [f for f in files if f != MANIFEST_NAME]
+        else:
+            relPrefix = relDir.replace('\\', '/') + '/'
+        dirs[:] = [d for d in dirs if not rules.pruneDir(relPrefix + d)]
+        for name in files:
+            if rules.wantFile(relPrefix + name):
+                yield os.path.join(root, name), relPrefix + name
+
+
+def runTasks(func, tasks, workers=1):
+    """
+    map func over tasks, on a bounded thread pool when workers > 1.
+    Results come back in the order of tasks whatever order the workers finish in.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    pool = ThreadPool(workers)
+    try:
+        for result in pool.imap(func, tasks):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def copyWithStat(sourceFile, targetFile, st=None):
+    """
+    copy the data and carry the source mtime over, so the next sync can see the file is unchanged
+    :param sourceFile:
+    :param targetFile:
+    :param st: os.stat of the source, when the caller has it already
+    :return: (number of bytes copied, copy backend used)
+    """
+    st = st or os.stat(sourceFile)
+    backend = copyBackend.copyFile(sourceFile, targetFile)
+    os.utime(targetFile, (st.st_atime, st.st_mtime))
+    return st.st_size, backend
+
+
+def _fileTask(targetDir, record, force, verify=False):
+    """
+    build the per file worker: stat, compare, make the folder and copy.
+    Returns (status, source file, bytes or exception, relative path, stat, copy backend, digest)
+    """
+    madeDirs = set()
+
+    def task(item):
+        sourceFile, rel = item
+        targetFile = os.path.join(targetDir, rel)
+        try:
+            st = os.stat(sourceFile)
+            if not force:
+                if record is not None:
+                    old = record.get(rel)
+                else:
+                    try:
+                        tst = os.stat(targetFile)
+                        old = [tst.st_size, tst.st_mtime]
+                    except OSError:
+                        old = None
+                if sameStat(st.st_size, st.st_mtime, old):
+                    return SKIPPED, sourceFile, 0, rel, st, None, old[2] if len(old) > 2 else None
+                # a digest of a hash this python lacks (blake2b read by python 2, xxh3 without xxhash)
+                # cannot be checked, the file is copied again and gets a digest of the default hash
+                if (verify and old is not None and len(old) > 2 and old[0] == st.st_size and
+                        copyBackend.hashAvailable(old[2].split(':', 1)[0])):
+                    # touched but maybe not changed: one read of the source instead of a copy
+                    digest = copyBackend.hashFile(sourceFile, old[2].split(':', 1)[0])
+                    if digest == old[2] and os.path.isfile(targetFile):
+                        os.utime(targetFile, (st.st_atime, st.st_mtime))
+                        return SKIPPED, sourceFile, 0, rel, st, None, digest
+
+            targetRoot = os.path.dirname(targetFile)
+            if targetRoot not in madeDirs:
+                makeDirs(targetRoot)
+                madeDirs.add(targetRoot)
+            if verify:
+                digest = copyBackend.copyFileVerified(sourceFile, targetFile)
+                os.utime(targetFile, (st.st_atime, st.st_mtime))
+                return COPIED, sourceFile, st.st_size, rel, st, copyBackend.HASHED, digest
+            size, backend = copyWithStat(sourceFile, targetFile, st)
+            return COPIED, sourceFile, size, rel, st, backend, None
+        except (IOError, OSError) as e:
+            return FAILED, sourceFile, e, rel, None, None, None
+
+    return task
+
+
+def syncFiles(sourceDir, targetDir, manifest=False, workers=1, verify=False, rules=None):
+    """
+    Mirror sourceDir into targetDir, skipping files whose size and mtime did not change.
+    :param sourceDir:
+    :param targetDir:
+    :param manifest: keep a manifest file in targetDir and compare against it instead of
+                     stat-ing the target, so a run costs one stat per source file.
+                     Files changed in the target behind the sync's back are not noticed.
+    :param workers: number of copy threads, 1 copies serially
+    :param verify: hash every file while it is copied and keep the digests in the manifest
+                   (implies manifest). A file whose mtime moved but whose size did not is hashed
+                   and only copied when its digest changed.
+    :param rules: include / exclude rules, see iterSource
+    :return: SyncStats
+    """
+    stats = SyncStats()
+    # an unreadable folder is counted as an error, its files would silently be missing otherwise
+    items = iterSource(sourceDir, rules, onerror=lambda e: stats.errors.append((e.filename, e)))
+    record = Manifest(targetDir).load() if manifest or verify else None
+    task = _fileTask(targetDir, record, force=False, verify=verify)
+    for result in runTasks(task, items, workers):
+        stats.add(result)
+        if record is None or result[0] == FAILED:
+            continue
+        rel, st, digest = result[3], result[4], result[6]
+        # a skipped file whose mtime still differs was found unchanged by its digest
+        if result[0] == COPIED or int(record.get(rel)[1]) != int(st.st_mtime):
+            record.set(rel, st.st_size, st.st_mtime, digest)
+
+    if record is not None:
+        record.save()
+    return stats
+
+
+def coverFiles(sourceDir, targetDir, workers=1):
+    """
+    Copy every file in the first level of sourceDir over the ones in targetDir
+    :param sourceDir:
+    :param targetDir:
+    :param workers: number of copy threads, 1 copies serially
+    :return: SyncStats
+    """
+    stats = SyncStats()
+    items = []
+    for name in os.listdir(sourceDir):
+        sourceFile = os.path.join(sourceDir, name)
+        if os.path.isfile(sourceFile):
+            items.append((sourceFile, name))
+    task = _fileTask(targetDir, None, force=True)
+    for result in runTasks(task, items, workers):
+        stats.add(result)
+    return stats
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  10:45
+# Email     : spirit_az@foxmail.com
+# File      : keywordMatch.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import re
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+
+
+def _alternation(words, flags):
+    # longest first so a keyword is never shadowed by its own prefix
+    words = sorted(set(words), key=len, reverse=True)
+    return re.compile('|'.join(re.escape(w) for w in words), flags)
+
+
+class KeywordMatcher(object):
+    """
+    compiled filter for file names, build once and reuse it over many listings.
+        allOf  : plain 'in' tests, stopping at the first keyword missing; a lookahead regex
+                 '(?=.*a)(?=.*b)' rescans the name per keyword and is slower
+        anyOf  : one alternation, 'a|b', one regex scan instead of a python loop
+        noneOf : one alternation, a name matching it is rejected
+    """
+
+    def __init__(self, allOf=(), anyOf=(), noneOf=(), ignoreCase=False):
+        self.allOf = tuple(allOf)
+        self.anyOf = tuple(anyOf)
+        self.noneOf = tuple(noneOf)
+        self.ignoreCase = ignoreCase
+
+        flags = re.S | (re.I if ignoreCase else 0)
+        self._all = None
+        self._any = None
+        self._none = None
+        if self.allOf:
+            self._all = tuple(w.lower() for w in self.allOf) if ignoreCase else self.allOf
+        if self.anyOf:
+            self._any = _alternation(self.anyOf, flags).search
+        if self.noneOf:
+            self._none = _alternation(self.noneOf, flags).search
+
+    def match(self, name):
+        if self._all is not None:
+            text = name.lower() if self.ignoreCase else name
+            for word in self._all:
+                if word not in text:
+                    return False
+        if self._none is not None and self._none(name) is not None:
+            return False
+        if self._any is not None and self._any(name) is None:
+            return False
+        return True
+
+    __call__ = match
+
+    def filter(self, names):
+        """
+        :return: list of the names that match, order kept
+        """
+        return [n for n in names if self.match(n)]
+
+    def __repr__(self):
+        return '<KeywordMatcher all=%r any=%r none=%r>' % (self.allOf, self.anyOf, self.noneOf)
+
+
+_compiled = {}
+
+
+def compileMatcher(allOf=(), anyOf=(), noneOf=(), ignoreCase=False):
+    """
+    KeywordMatcher shared by every caller asking for the same keywords
+    """
+    key = (tuple(allOf), tuple(anyOf), tuple(noneOf), ignoreCase)
+    matcher = _compiled.get(key)
+    if matcher is None:
+        if len(_compiled) > 128:
+            _compiled.clear()
+        matcher = _compiled[key] = KeywordMatcher(*key)
+    return matcher
@@ -6,15 +6,18 @@
 __author__ = 'ChenLiang.Miao'
 # import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 import os
-import existsUI as exUI
-import baseFunction as bFc
+from . import existsUI as exUI
+from . import baseFunction as bFc
+from . import perfTrace
 from imp import reload
 
 reload(exUI)
 
 # function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+# importing this module, e.g. from a shelf, must stay under it: the form is only built by show().
+# checked by other/benchmark.py --openui-budget
+IMPORT_BUDGET_MS = 30.0
 
-houdini_win = exUI.getMainWindow()
 __abs_path__ = bFc.getScriptPath().replace('\\', '/')
 main_win_name = 'tool name'
 scriptVersion = 'version by author'
@@ -30,42 +33,76 @@ def getUIPath():
 
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-form_class, base_class = exUI.loadUi(getUIPath())
+_mainFunc = None
 
 
-# +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+def _buildMainFunc():
+    form_class, base_class = exUI.loadUi(getUIPath())
 
-class mainFunc(form_class, base_class):
-    def __init__(self, parent=houdini_win):
-        super(mainFunc, self).__init__(parent)
-        self._init_ui()
-        self._bt_clicked()
+    class mainFunc(form_class, base_class):
+        def __init__(self, parent=None):
+            super(mainFunc, self).__init__(parent or exUI.getMainWindow())
+            self._init_ui()
+            self._bt_clicked()
 
-    def _init_ui(self):
-        # print exUI.getStyleSheet()
-        # self.setStyleSheet(exUI.getStyleSheet())
-        pass
+        def _init_ui(self):
+            # print exUI.getStyleSheet()
+            # self.setStyleSheet(exUI.getStyleSheet())
+            pass
 
-    def _bt_clicked(self):
-        pass
+        def _bt_clicked(self):
+            pass
 
+    return mainFunc
 
-def show():
-    exUI.deleteUI(exUI.QMainWindow, main_win_name)
-    anim_path = icon_path('waiting.gif')
-    splash = exUI.mSplashScreen(anim_path, exUI.Qt.WindowStaysOnTopHint)
-    splash.setParent(houdini_win)
-    splash.show()
-    ui = mainFunc()  # type: exUI.QMainWindow
+
+@perfTrace.timed
+def getMainFunc():
+    """
+    the tool window class, its form loaded on the first call and kept for the session
+    """
+    global _mainFunc
+    if _mainFunc is None:
+        _mainFunc = _buildMainFunc()
+    return _mainFunc
+
+
+def _makeWindow():
+    ui = getMainFunc()()  # type: exUI.QMainWindow
     # 设置名称 一定不可以在初始化的时候设置，否则会出问题
     ui.setObjectName(main_win_name)
     ui.setWindowTitle('%s %s' % (main_win_name, scriptVersion))
     ui.setWindowIcon(exUI.QIcon(icon_path('MCL.png')))
+    return exUI.registerWindow(ui)
+
+
+def _styleWindow():
+    # before the first show, styling a visible window repaints it
+    _startup.window.setStyleSheet(exUI.getStyleSheet())
+
+
+# ms the splash stays at least, 0 closes it as soon as the window is shown
+splashMinMs = 0
+_startup = None
+
+
+@perfTrace.timed
+def show():
+    """
+    start the tool: the splash animates while the window is built step by step off the event loop.
+    the time to interactive goes to the startup pipeline's interactive signal and exUI.addStartupHook hooks
+    :return: the startup pipeline, its window is set once built
+    """
+    global _startup
+    exUI.deleteUI(exUI.QMainWindow, main_win_name)
+    anim_path = icon_path('waiting.gif')
+    splash = exUI.mSplashScreen(anim_path, exUI.Qt.WindowStaysOnTopHint)
+    splash.setParent(exUI.getMainWindow())
     splash.showMessage('author : %s' % __author__, exUI.Qt.AlignLeft | exUI.Qt.AlignBottom,
                        exUI.Qt.yellow)
-    t = exUI.QElapsedTimer()
-    t.start()
-    while t.elapsed() < 600:
-        exUI.QCoreApplication.processEvents()
-    splash.finish(ui)
-    ui.setStyleSheet(exUI.getStyleSheet())
+    _startup = exUI.mStartupPipeline(main_win_name, splash, splashMinMs)
+    # trash an earlier session did not finish deleting
+    _startup.add(bFc.bulkDelete.reapLeftovers, 'reap')
+    _startup.add(getMainFunc, 'form').add(_makeWindow, 'window', window=True).add(_styleWindow, 'style')
+    return _startup.start()
+
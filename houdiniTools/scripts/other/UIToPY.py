@@ -8,19 +8,19 @@ __author__ = 'ChenLiang.Miao'
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 # import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 import os
-import glob
-import pyside2uic as uic
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+import buildAssets
 
 
-# proc function -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 # function main -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-def uicToPY(name):
-    with open(str(name).replace('.ui', '.py'), 'w') as f:
-        uic.compileUi(name, f)
+def run(force=False):
+    """
+    build the changed .ui forms of houdiniTools/scripts/UI to .py, see buildAssets
+    """
+    return buildAssets.build(['houdini-ui'], force=force)
 
 
 if __name__ == '__main__':
-    dir_name = os.path.dirname(os.path.dirname(__file__))
-    filepath = '{}/UI/*.ui'.format(dir_name)
-    func = lambda x: uicToPY(x)
-    map(func, glob.glob(filepath))
+    sys.exit(buildAssets.main(sys.argv[1:], targets=['houdini-ui']))
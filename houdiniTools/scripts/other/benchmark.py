@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding:UTF-8 -*-
+# @Time  : 2020/3/2 0002 21:30
+# @File  : benchmark.py
+# @email : spirit_az@foxmail.com
+from __future__ import print_function
+
+__author__ = 'ChenLiang.Miao'
+
+# +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, ROOT)
+from houdiniTools.scripts import baseFunction
+from houdiniTools.scripts import fileSync
+from houdiniTools.scripts import perfTrace
+
+
+# proc function -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+def make_small_files(root, count=2000, size=1024, per_dir=100):
+    data = b'x' * size
+    for i in range(count):
+        folder = os.path.join(root, 'd%03d' % (i // per_dir))
+        os.path.exists(folder) or os.makedirs(folder)
+        with open(os.path.join(folder, 'f%05d.bin' % i), 'wb') as f:
+            f.write(data)
+    return root
+
+
+def add_latency(seconds):
+    """
+    emulate the per file round trip of a network share on a local disk
+    """
+    copy = fileSync.copyWithStat
+
+    def slow_copy(*args, **kwargs):
+        time.sleep(seconds)
+        return copy(*args, **kwargs)
+
+    fileSync.copyWithStat = slow_copy
+
+
+def bench_copy(source, target_root, workers_list):
+    # untimed warm up: the first run would also pay for the lazy imports of the copy path
+    warm_up = os.path.join(target_root, 'warmUp')
+    fileSync.syncFiles(source, warm_up, workers=workers_list[0])
+    shutil.rmtree(warm_up)
+    results = []
+    for workers in workers_list:
+        target = os.path.join(target_root, 'w%d' % workers)
+        start = time.time()
+        stats = fileSync.syncFiles(source, target, workers=workers)
+        results.append((workers, time.time() - start, stats))
+        shutil.rmtree(target)
+    return results
+
+
+# suite -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+# kind: (files, bytes per file, files per folder, nesting depth), scaled by --scale
+TREES = {
+    'tiny': (5000, 64, 500, 1),
+    'huge': (3, 32 * 1024 * 1024, 3, 1),
+    'deep': (800, 256, 20, 40),
+    'wide': (10000, 16, 10000, 1),
+}
+
+
+def make_tree(root, kind, scale=1.0):
+    """
+    synthetic tree of one TREES kind
+    :return: (folder with the most files, file count, total bytes)
+    """
+    count, size, per_dir, depth = TREES[kind]
+    count = max(1, int(count * scale))
+    if kind == 'huge':
+        size = max(1, int(size * scale))
+    chunk = os.urandom(min(size, 1024 * 1024))
+    biggest = None
+    for i in range(count):
+        folder = root
+        if depth > 1:
+            # one chain of nested folders, per_dir files on every level
+            for level in range(min(depth, i // per_dir + 1)):
+                folder = os.path.join(folder, 'n%02d' % level)
+        else:
+            folder = os.path.join(folder, 'd%03d' % (i // per_dir))
+        biggest = biggest or folder
+        os.path.exists(folder) or os.makedirs(folder)
+        with open(os.path.join(folder, 'f%05d.bin' % i), 'wb') as f:
+            left = size
+            while left > 0:
+                f.write(chunk[:left])
+                left -= len(chunk)
+    # folders changed a moment ago are never cached, make the tree look like one written earlier
+    old = time.time() - 3600
+    for folder, dirs, files in os.walk(root):
+        os.utime(folder, (old, old))
+    return biggest, count, count * size
+
+
+def _time(func, repeat, setup=None):
+    """
+    :return: sorted seconds of repeat runs of func(), setup() runs untimed before each.
+             One untimed run goes first, it pays for the lazy imports of baseFunction
+    """
+    setup and setup()
+    func()
+    times = []
+    for _ in range(repeat):
+        setup and setup()
+        start = perfTrace.clock()
+        func()
+        times.append(perfTrace.clock() - start)
+    return sorted(times)
+
+
+def bench_tree(tmp, kind, scale, repeat):
+    """
+    time the baseFunction file helpers on one synthetic tree
+    :return: {op: sorted seconds}
+    """
+    source = os.path.join(tmp, kind, 'source')
+    target = os.path.join(tmp, kind, 'target')
+    list_dir, count, size = make_tree(source, kind, scale)
+    paths = [os.path.join(root, f) for root, dirs, files in os.walk(source) for f in files]
+
+    def clear_target():
+        os.path.exists(target) and shutil.rmtree(target)
+
+    def fill_target():
+        clear_target()
+        baseFunction.copyFiles(source, target)
+
+    ops = {
+        'GetFileList': _time(lambda: baseFunction.GetFileList(list_dir, ['f0', '.bin']), repeat),
+        'getListDir': _time(lambda: baseFunction.getListDir(list_dir, 'file', cached=False), repeat),
+        'getListDir_cached': _time(lambda: baseFunction.getListDir(list_dir, 'file'), repeat),
+        'copyFiles': _time(lambda: baseFunction.copyFiles(source, target), repeat, clear_target),
+        # every file unchanged, what a repeated sync costs
+        'copyFiles_unchanged': _time(lambda: baseFunction.copyFiles(source, target), repeat, fill_target),
+        'coverFiles': _time(lambda: baseFunction.coverFiles(list_dir, target), repeat, clear_target),
+        'remove_dir': _time(lambda: baseFunction.remove_dir(target), repeat, fill_target),
+        'listDel': _time(lambda: baseFunction.listDel(paths + paths[::-1]), repeat),
+    }
+    shutil.rmtree(os.path.join(tmp, kind), ignore_errors=True)
+    return dict((op, {'times': times, 'files': count, 'bytes': size}) for op, times in ops.items())
+
+
+def git_commit():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.STDOUT)
+        return out.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(kinds, scale=1.0, repeat=3, tmp_root=None):
+    """
+    :return: {'meta': {...}, 'results': {'kind/op': {'min', 'median', 'files', 'bytes'}}}, seconds
+    """
+    results = {}
+    tmp = tempfile.mkdtemp(prefix='fileBench', dir=tmp_root)
+    try:
+        for kind in kinds:
+            for op, data in bench_tree(tmp, kind, scale, repeat).items():
+                times = data['times']
+                results['%s/%s' % (kind, op)] = {'min': times[0], 'median': times[len(times) // 2],
+                                                 'files': data['files'], 'bytes': data['bytes']}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    meta = {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+            'scale': scale, 'repeat': repeat, 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def compare(base, new, tolerance=0.1):
+    """
+    print new against base, by min time
+    :return: keys more than tolerance slower than base
+    """
+    slower = []
+    for key in sorted(new['results']):
+        now = new['results'][key]['min']
+        old = base['results'].get(key, {}).get('min')
+        if not old:
+            print('%-30s %9.4fs' % (key, now))
+            continue
+        ratio = now / old
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  SLOWER'
+            slower.append(key)
+        print('%-30s %9.4fs  was %9.4fs  x%.2f%s' % (key, now, old, ratio, flag))
+    return slower
+
+
+# import budget -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+IMPORT_BUDGET_MS = 30.0
+# modules baseFunction must leave to first use
+LAZY_MODULES = ('ctypes', 'getpass', 'inspect', 'multiprocessing', 'platform', 'shutil', 'sqlite3', 'winreg',
+                '_winreg', 'houdiniTools.scripts.fileSync', 'houdiniTools.scripts.copyScheduler')
+
+_IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, %r)
+before = set(sys.modules)
+start = time.time()
+from houdiniTools.scripts import baseFunction
+seconds = time.time() - start
+print(json.dumps({'seconds': seconds, 'loaded': sorted(set(sys.modules) - before)}))
+"""
+
+
+_OPENUI_PROBE = """
+import json, sys, time
+sys.path.insert(0, %r)
+# what a houdini session has loaded before a shelf imports the tool
+import hou
+from PySide2 import QtCore, QtGui, QtWidgets
+before = set(sys.modules)
+start = time.time()
+from houdiniTools.scripts import openUI
+seconds = time.time() - start
+print(json.dumps({'seconds': seconds, 'loaded': sorted(set(sys.modules) - before), 'built': openUI._mainFunc is not None,
+                  'budget': openUI.IMPORT_BUDGET_MS}))
+"""
+
+
+def _probe(source, runs):
+    best = None
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', source])
+        data = json.loads(out.decode('utf-8').strip().splitlines()[-1])
+        if best is None or data['seconds'] < best['seconds']:
+            best = data
+    return best
+
+
+def import_cost(module_root=ROOT, runs=5):
+    """
+    cold import of baseFunction, each run in a fresh interpreter
+    :return: (best seconds, modules the import loaded)
+    """
+    data = _probe(_IMPORT_PROBE % module_root, runs)
+    return data['seconds'], data['loaded']
+
+
+def check_import_budget(budget_ms=IMPORT_BUDGET_MS, runs=5):
+    """
+    :return: list of problems, empty when the import is inside the budget and stayed lazy
+    """
+    seconds, loaded = import_cost(runs=runs)
+    print('baseFunction cold import: %.1f ms (budget %.1f ms), %d modules' % (seconds * 1e3, budget_ms, len(loaded)))
+    problems = []
+    if seconds * 1e3 > budget_ms:
+        problems.append('import takes %.1f ms, budget is %.1f ms' % (seconds * 1e3, budget_ms))
+    problems.extend('%s is imported eagerly' % m for m in LAZY_MODULES if m in loaded)
+    for problem in problems:
+        print('FAIL ' + problem)
+    return problems
+
+
+def check_openui_budget(budget_ms=None, runs=5):
+    """
+    import of openUI as a shelf does it, run with hython: houdini and PySide2 already loaded.
+    :param budget_ms: openUI.IMPORT_BUDGET_MS by default
+    :return: list of problems, empty when the import is inside the budget and left the form to show()
+    """
+    data = _probe(_OPENUI_PROBE % ROOT, runs)
+    budget_ms = budget_ms or data['budget']
+    print('openUI import: %.1f ms (budget %.1f ms), %d modules' % (data['seconds'] * 1e3, budget_ms, len(data['loaded'])))
+    problems = []
+    if data['seconds'] * 1e3 > budget_ms:
+        problems.append('import takes %.1f ms, budget is %.1f ms' % (data['seconds'] * 1e3, budget_ms))
+    if data['built']:
+        problems.append('the form is loaded at import')
+    for problem in problems:
+        print('FAIL ' + problem)
+    return problems
+
+
+# function main -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+def main_copy(args):
+    args.latency and add_latency(args.latency)
+
+    tmp = tempfile.mkdtemp(prefix='copyBench')
+    try:
+        source = make_small_files(os.path.join(tmp, 'source'), args.count, args.size)
+        target_root = args.target or os.path.join(tmp, 'target')
+        results = bench_copy(source, target_root, [int(x) for x in args.workers.split(',')])
+        base = results[0][1]
+        for workers, seconds, stats in results:
+            print('workers %2d : %7.3fs  x%.2f  %r' % (workers, seconds, base / seconds, stats))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main_suite(args):
+    data = run_suite(args.trees.split(','), args.scale, args.repeat, args.target)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            base = json.load(f)
+        return 1 if compare(base, data, args.tolerance) else 0
+    compare({'results': {}}, data)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='copy speed of many small files, serial vs thread pool; '
+                                                 'with --suite, timings of the baseFunction file helpers')
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=1024)
+    parser.add_argument('--workers', default='1,4,8,16')
+    parser.add_argument('--target', default=None, help='folder to copy into, e.g. on a network share')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of emulated latency per file')
+    parser.add_argument('--suite', action='store_true', help='run the file helper suite instead')
+    parser.add_argument('--import-budget', type=float, nargs='?', const=IMPORT_BUDGET_MS, default=None,
+                        help='check the cold import of baseFunction stays under this many ms and lazy; exit 1 when not')
+    parser.add_argument('--openui-budget', type=float, nargs='?', const=None, default=False,
+                        help='run with hython: check importing openUI stays under this many ms, openUI.IMPORT_BUDGET_MS '
+                             'by default, and does not load the form; exit 1 when not')
+    parser.add_argument('--trees', default=','.join(sorted(TREES)), help='suite trees: ' + ', '.join(sorted(TREES)))
+    parser.add_argument('--scale', type=float, default=1.0, help='suite tree size factor')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help='write the suite results to this json file')
+    parser.add_argument('--compare', default=None, help='json file of an earlier run; exit 1 when slower')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='slowdown --compare accepts, 0.1 = 10%%')
+    args = parser.parse_args()
+    if args.import_budget is not None:
+        sys.exit(1 if check_import_budget(args.import_budget) else 0)
+    if args.openui_budget is not False:
+        sys.exit(1 if check_openui_budget(args.openui_budget) else 0)
+    sys.exit(main_suite(args) if args.suite else main_copy(args))
@@ -8,25 +8,19 @@ __author__ = 'ChenLiang.Miao'
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 # import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 import os
-import glob
-import subprocess
+import sys
 
-
-# proc function -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-rccPath = r'D:\Program Files\Side Effects Software\Houdini 17.0.352\bin\Qt\rcc.exe'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+import buildAssets
 
 
 # function main -+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-def qrc_to_py(in_path):
-    qrc_path, file_flag = os.path.splitext(in_path)
-    print qrc_path.replace('\\', '/')
-    pipe = subprocess.Popen('{0} -o {1}_rc.py {1}.qrc'.format(rccPath, qrc_path.replace('\\', '/')),
-                            stdout=subprocess.PIPE, stdin=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=0x08)
-    del pipe
+def run(force=False):
+    """
+    build the changed .qrc of houdiniTools/scripts/UI to _rc.py with rcc, see buildAssets
+    """
+    return buildAssets.build(['houdini-qrc'], force=force)
 
 
 if __name__ == '__main__':
-    file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
-                             'UI/').replace('\\', '/')
-    func = lambda x: qrc_to_py(x)
-    map(func, glob.glob(file_path + '*.qrc'))
\ No newline at end of file
+    sys.exit(buildAssets.main(sys.argv[1:], targets=['houdini-qrc']))
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  09:40
+# Email     : spirit_az@foxmail.com
+# File      : perfTrace.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import collections
+import functools
+import math
+import os
+import sys
+import threading
+import time
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+ENV_VAR = 'MCL_PERF_TRACE'
+# durations kept per name for the percentiles, the oldest are dropped past it
+MAX_SAMPLES = 10000
+# spans kept for the chrome trace, later ones are only counted in the stats
+MAX_EVENTS = 200000
+
+# timer of every span, also used by the benchmarks and the build.
+# time.time only ticks every ~15.6 ms on windows, time.clock is the high resolution counter there on python 2
+clock = getattr(time, 'perf_counter', None) or (time.clock if sys.platform == 'win32' else time.time)
+
+_enabled = os.environ.get(ENV_VAR, '') not in ('', '0')
+
+
+class _Stat(object):
+    __slots__ = ('count', 'total', 'self', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.self = 0.0
+        self.max = 0.0
+        self.samples = collections.deque(maxlen=MAX_SAMPLES)
+
+
+class Recorder(object):
+    """
+    collects the spans of every thread: aggregate stats per name and the raw spans for the trace
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+            self.events = []
+            self.dropped = 0
+            self.origin = clock()
+            self.threads = {}
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, name, start, end, child):
+        duration = end - start
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = _Stat()
+            stat.count += 1
+            stat.total += duration
+            stat.self += duration - child
+            stat.max = max(stat.max, duration)
+            stat.samples.append(duration)
+            if len(self.events) < MAX_EVENTS:
+                thread = threading.current_thread()
+                self.threads[thread.ident] = thread.name
+                self.events.append((name, start, duration, thread.ident, len(self._stack())))
+            else:
+                self.dropped += 1
+
+
+_recorder = Recorder()
+
+
+class _Span(object):
+    """
+    timer of one block; spans opened inside it are its children, their time is left out of its self time
+    """
+    __slots__ = ('name', 'start', 'child')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.child = 0.0
+        _recorder._stack().append(self)
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc):
+        end = clock()
+        stack = _recorder._stack()
+        stack.pop()
+        if stack:
+            stack[-1].child += end - self.start
+        _recorder.record(self.name, self.start, end, self.child)
+        return False
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def enable(on=True):
+    """
+    start / stop recording; the MCL_PERF_TRACE environment variable turns it on at import
+    """
+    global _enabled
+    _enabled = bool(on)
+
+
+def isEnabled():
+    return _enabled
+
+
+def span(name):
+    """
+    with perfTrace.span('load cache'):
+        ...
+    costs one flag test when recording is off
+    """
+    return _Span(name) if _enabled else _NULL
+
+
+def timed(func=None, name=None):
+    """
+    decorator recording every call of func, as @timed or @timed(name='...').
+    The name defaults to module.function; arguments and the return value pass through untouched.
+    """
+    if func is None:
+        return functools.partial(timed, name=name)
+    label = name or '%s.%s' % (func.__module__.rsplit('.', 1)[-1], func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _Span(label):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def reset():
+    _recorder.reset()
+
+
+def _percentile(ordered, fraction):
+    # nearest rank
+    if not ordered:
+        return 0.0
+    return ordered[max(0, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+def stats():
+    """
+    :return: {name: {'count', 'total', 'self', 'mean', 'p50', 'p95', 'max'}}, times in seconds
+    """
+    with _recorder._lock:
+        items = [(name, s.count, s.total, s.self, s.max, sorted(s.samples)) for name, s in _recorder.stats.items()]
+    result = {}
+    for name, count, total, selfTime, longest, ordered in items:
+        result[name] = {'count': count, 'total': total, 'self': selfTime, 'mean': total / count,
+                        'p50': _percentile(ordered, 0.5), 'p95': _percentile(ordered, 0.95), 'max': longest}
+    return result
+
+
+def report(limit=None):
+    """
+    stats as a text table, biggest total first
+    """
+    rows = sorted(stats().items(), key=lambda item: -item[1]['total'])[:limit]
+    lines = ['%-40s %8s %10s %10s %10s %10s' % ('name', 'count', 'total ms', 'self ms', 'p50 ms', 'p95 ms')]
+    for name, s in rows:
+        lines.append('%-40s %8d %10.2f %10.2f %10.3f %10.3f' % (
+            name, s['count'], s['total'] * 1e3, s['self'] * 1e3, s['p50'] * 1e3, s['p95'] * 1e3))
+    return '\n'.join(lines)
+
+
+def _write(path, data):
+    import json
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(tmp, path)
+
+
+def exportJSON(path):
+    """
+    write stats() to path
+    """
+    _write(path, {'pid': os.getpid(), 'dropped': _recorder.dropped, 'stats': stats()})
+
+
+def chromeTrace():
+    """
+    spans in the chrome trace event format, open the file in chrome://tracing or ui.perfetto.dev
+    """
+    pid = os.getpid()
+    with _recorder._lock:
+        events = list(_recorder.events)
+        threads = dict(_recorder.threads)
+        origin = _recorder.origin
+    trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+             for tid, name in threads.items()]
+    for name, start, duration, tid, depth in events:
+        trace.append({'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                      'ts': (start - origin) * 1e6, 'dur': duration * 1e6, 'args': {'depth': depth}})
+    return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+
+def exportChromeTrace(path):
+    _write(path, chromeTrace())
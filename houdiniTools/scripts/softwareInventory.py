@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  16:10
+# Email     : spirit_az@foxmail.com
+# File      : softwareInventory.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+try:
+    import winreg
+except ImportError:
+    try:
+        import _winreg as winreg
+    except ImportError:
+        winreg = None
+
+from . import userDirs
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+DEFAULT_TTL = 24 * 3600
+
+VERSION_RE = re.compile(r'(\d+(?:\.\d+)+)')
+
+
+def cachePath():
+    return os.path.join(userDirs.userDir('inventory'), 'mclInventory.json').replace('\\', '/')
+
+
+def _item(name, version=None, location=None, source=None):
+    return {'name': name, 'version': version, 'location': location, 'source': source}
+
+
+def _dirSignature(folders):
+    """
+    mtime / inode of every folder, None for the missing ones; moves when an entry is added or removed
+    """
+    sig = []
+    for folder in folders:
+        try:
+            st = os.stat(folder)
+        except OSError:
+            sig.append(None)
+            continue
+        sig.append([getattr(st, 'st_mtime_ns', st.st_mtime), st.st_ino])
+    return sig
+
+
+# backends +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+class Backend(object):
+    """
+    one source of installed software.
+    signature() has to be much cheaper than scan(): the cached scan is reused while it is unchanged.
+    """
+    name = None
+
+    def available(self):
+        return True
+
+    def signature(self):
+        raise NotImplementedError
+
+    def scan(self):
+        """
+        :return: [{'name', 'version', 'location', 'source'}, ...]
+        """
+        raise NotImplementedError
+
+
+class RegistryBackend(Backend):
+    """
+    DisplayName of every Uninstall key, 64 and 32 bit, machine and user wide
+    """
+    name = 'registry'
+
+    KEYS = [('HKEY_LOCAL_MACHINE', r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'),
+            ('HKEY_LOCAL_MACHINE', r'SOFTWARE\Wow6432Node\Microsoft\Windows\CurrentVersion\Uninstall'),
+            ('HKEY_CURRENT_USER', r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall')]
+
+    def available(self):
+        return winreg is not None
+
+    def _open(self, hive, path):
+        try:
+            # read access is all a listing needs, KEY_ALL_ACCESS fails for normal users
+            return winreg.OpenKey(getattr(winreg, hive), path, 0, winreg.KEY_READ)
+        except (OSError, EnvironmentError):
+            return None
+
+    def signature(self):
+        sig = []
+        for hive, path in self.KEYS:
+            key = self._open(hive, path)
+            if key is None:
+                sig.append(None)
+                continue
+            try:
+                subKeys, values, modified = winreg.QueryInfoKey(key)
+                sig.append([subKeys, modified])
+            finally:
+                winreg.CloseKey(key)
+        return sig
+
+    def _value(self, key, name):
+        try:
+            return winreg.QueryValueEx(key, name)[0] or None
+        except (OSError, EnvironmentError):
+            return None
+
+    def scan(self):
+        items = []
+        for hive, path in self.KEYS:
+            key = self._open(hive, path)
+            if key is None:
+                continue
+            try:
+                for i in range(winreg.QueryInfoKey(key)[0]):
+                    try:
+                        sub = winreg.OpenKey(key, winreg.EnumKey(key, i), 0, winreg.KEY_READ)
+                    except (OSError, EnvironmentError):
+                        continue
+                    try:
+                        name = self._value(sub, 'DisplayName')
+                        if name:
+                            items.append(_item(name, self._value(sub, 'DisplayVersion'),
+                                               self._value(sub, 'InstallLocation'), self.name))
+                    finally:
+                        winreg.CloseKey(sub)
+            finally:
+                winreg.CloseKey(key)
+        return items
+
+
+class DesktopBackend(Backend):
+    """
+    applications of the freedesktop .desktop files, what the linux menus show
+    """
+    name = 'desktop'
+
+    def __init__(self, folders=None):
+        self.folders = folders or [
+            '/usr/share/applications',
+            '/usr/local/share/applications',
+            os.path.expanduser('~/.local/share/applications'),
+            '/var/lib/flatpak/exports/share/applications',
+            '/var/lib/snapd/desktop/applications',
+        ]
+
+    def available(self):
+        return sys.platform.startswith('linux')
+
+    def signature(self):
+        return _dirSignature(self.folders)
+
+    @staticmethod
+    def parse(path):
+        """
+        the [Desktop Entry] keys of one file, None for hidden entries
+        """
+        entry = {}
+        section = None
+        with io.open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    section = line
+                    continue
+                if section != '[Desktop Entry]' or '=' not in line or line.startswith('#'):
+                    continue
+                key, value = line.split('=', 1)
+                # Name[de]= and friends are translations
+                entry.setdefault(key.strip(), value.strip())
+        if entry.get('Type', 'Application') != 'Application':
+            return None
+        if entry.get('Hidden') == 'true' or entry.get('NoDisplay') == 'true':
+            return None
+        return entry
+
+    def scan(self):
+        items = []
+        for folder in self.folders:
+            try:
+                names = sorted(os.listdir(folder))
+            except OSError:
+                continue
+            for fileName in names:
+                if not fileName.endswith('.desktop'):
+                    continue
+                try:
+                    entry = self.parse(os.path.join(folder, fileName))
+                except (IOError, OSError):
+                    continue
+                if entry and entry.get('Name'):
+                    match = VERSION_RE.search(entry.get('Exec', ''))
+                    items.append(_item(entry['Name'], match.group(1) if match else None,
+                                       entry.get('Path') or entry.get('Exec'), self.name))
+        return items
+
+
+class FolderBackend(Backend):
+    """
+    every folder in the install roots is one program, e.g. /opt/hfs19.5.303 or /usr/autodesk/maya2020
+    """
+    name = 'opt'
+
+    def __init__(self, roots=None):
+        self.roots = roots or ['/opt', '/usr/autodesk']
+
+    def available(self):
+        return os.name != 'nt'
+
+    def signature(self):
+        return _dirSignature(self.roots)
+
+    def scan(self):
+        items = []
+        for root in self.roots:
+            try:
+                names = sorted(os.listdir(root))
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(root, name)
+                if name.startswith('.') or not os.path.isdir(path):
+                    continue
+                match = VERSION_RE.search(name)
+                items.append(_item(name, match.group(1) if match else None, path, self.name))
+        return items
+
+
+def defaultBackends():
+    return [b for b in (RegistryBackend(), DesktopBackend(), FolderBackend()) if b.available()]
+
+
+# inventory --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+class Inventory(object):
+    """
+    installed software of every backend, cached on disk per backend.
+    A backend is scanned again only when its signature changed or its scan is older than ttl seconds,
+    so repeated queries from the tools cost a few stats and one small json read.
+    """
+
+    def __init__(self, backends=None, path=None, ttl=DEFAULT_TTL):
+        self.backends = defaultBackends() if backends is None else backends
+        self.path = path or cachePath()
+        self.ttl = ttl
+        self.scans = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # a cache somebody else wrote is not trusted, it is scanned again and replaced
+        if not userDirs.isOwned(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        tmp = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            try:
+                os.replace(tmp, self.path)
+            except AttributeError:
+                os.path.exists(self.path) and os.remove(self.path)
+                os.rename(tmp, self.path)
+        except (IOError, OSError):
+            # a cache that cannot be written only costs a scan next time
+            pass
+
+    def items(self, refresh=False):
+        """
+        :param refresh: scan every backend, whatever the cache says
+        :return: [{'name', 'version', 'location', 'source'}, ...]
+        """
+        with self._lock:
+            data = self._load()
+            dirty = False
+            items = []
+            now = time.time()
+            for backend in self.backends:
+                # lists and tuples both come back from json as lists
+                sig = json.loads(json.dumps(backend.signature()))
+                cached = data.get(backend.name)
+                if refresh or not cached or cached.get('signature') != sig or now - cached.get('time', 0) > self.ttl:
+                    self.scans += 1
+                    cached = data[backend.name] = {'signature': sig, 'time': now, 'items': backend.scan()}
+                    dirty = True
+                items.extend(cached['items'])
+            dirty and self._save(data)
+            return items
+
+    def names(self, refresh=False):
+        """
+        :return: sorted display names, each once
+        """
+        return sorted(set(item['name'] for item in self.items(refresh)))
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+_inventory = None
+
+
+def getInventory():
+    global _inventory
+    if _inventory is None:
+        _inventory = Inventory()
+    return _inventory
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  10:20
+# Email     : spirit_az@foxmail.com
+# File      : treeSnapshot.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import collections
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+from . import dirList
+from . import fileSync
+from . import userDirs
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+TreeDiff = collections.namedtuple('TreeDiff', 'added removed modified')
+
+# (is_dir, size, mtime, ino) of one entry
+_Stat = collections.namedtuple('_Stat', 'is_dir size mtime ino')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY, parent TEXT, is_dir INTEGER, size INTEGER, mtime REAL, ino INTEGER
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY, mtime INTEGER, ino INTEGER, dev INTEGER
+) WITHOUT ROWID;
+'''
+
+
+DEFAULT_CALLER = 'default'
+# dbPath of an index kept in memory for the life of its TreeSnapshot, e.g. the baseline of a poll
+MEMORY = ':memory:'
+
+
+def snapshotDir():
+    return userDirs.userDir('treeSnapshots')
+
+
+def defaultDbPath(root, caller=DEFAULT_CALLER):
+    """
+    one index file per tree and caller, named after the tree's absolute path.
+    An update consumes the changes, so two tools asking about one tree need an index each.
+    """
+    key = os.path.normcase(os.path.abspath(root)).replace('\\', '/')
+    name = '%s.%s.sqlite' % (hashlib.sha1(key.encode('utf-8')).hexdigest(), re.sub(r'[^\w.-]', '_', caller))
+    return os.path.join(snapshotDir(), name).replace('\\', '/')
+
+
+def _join(parent, name):
+    return parent + '/' + name if parent else name
+
+
+def _lstat(path):
+    st = os.lstat(path)
+    return _Stat(False, st.st_size, st.st_mtime, st.st_ino)
+
+
+class TreeSnapshot(object):
+    """
+    index of a folder tree (path, size, mtime, inode of every entry) kept in sqlite between runs.
+
+    update() walks the tree against the last snapshot: every known folder is stat-ed, but only the
+    folders whose mtime / inode moved are listed again, the others reuse their stored children.
+    A folder's mtime only moves when entries are added, removed or renamed in it, so the files of
+    an unchanged folder are still lstat-ed for content changes, unless statFiles=False.
+    Paths are relative to root with '/' separators.
+    """
+
+    def __init__(self, root, dbPath=None, caller=DEFAULT_CALLER):
+        """
+        :param caller: name of whoever asks, e.g. the tool, see defaultDbPath; unused with a dbPath
+        """
+        self.root = root
+        self.dbPath = dbPath or defaultDbPath(root, caller)
+        self._memory = None
+
+    def _connect(self):
+        if self.dbPath == MEMORY:
+            if self._memory is None:
+                # one connection for the whole life of the index, callers serialize its use
+                self._memory = sqlite3.connect(MEMORY, check_same_thread=False)
+                self._memory.text_factory = str
+                self._memory.executescript(_SCHEMA)
+            return self._memory
+        folder = os.path.dirname(self.dbPath)
+        folder and fileSync.makeDirs(folder)
+        db = sqlite3.connect(self.dbPath)
+        # byte string paths on python 2
+        db.text_factory = str
+        db.executescript(_SCHEMA)
+        return db
+
+    def _release(self, db):
+        db is not self._memory and db.close()
+
+    def _load(self, db):
+        children = collections.defaultdict(dict)
+        for path, parent, is_dir, size, mtime, ino in db.execute('SELECT * FROM entries'):
+            children[parent][path] = _Stat(bool(is_dir), size, mtime, ino)
+        sigs = dict((path, (mtime, ino, dev)) for path, mtime, ino, dev in db.execute('SELECT * FROM dirs'))
+        return children, sigs
+
+    def _listDir(self, rel):
+        stats = {}
+        for e in dirList.scandir(os.path.join(self.root, rel)):
+            if e.name == dirList.TRASH_NAME:
+                continue
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    stats[_join(rel, e.name)] = _Stat(True, None, None, None)
+                    continue
+                st = e.stat(follow_symlinks=False)
+            except OSError:
+                # removed while listing
+                continue
+            stats[_join(rel, e.name)] = _Stat(False, st.st_size, st.st_mtime, st.st_ino)
+        return stats
+
+    def _walk(self, oldChildren, oldSigs, statFiles):
+        """
+        :return: (children {parent: {path: _Stat}}, sigs {dir: signature}) of the tree now
+        """
+        children = {}
+        sigs = {}
+        stack = ['']
+        while stack:
+            rel = stack.pop()
+            try:
+                st = os.stat(os.path.join(self.root, rel))
+            except OSError:
+                continue
+            sig = dirList.statSignature(st)
+            if oldSigs.get(rel) == sig and rel in oldChildren:
+                stats = dict(oldChildren[rel])
+                if statFiles:
+                    for path, old in list(stats.items()):
+                        if old.is_dir:
+                            continue
+                        try:
+                            stats[path] = _lstat(os.path.join(self.root, path))
+                        except OSError:
+                            del stats[path]
+            else:
+                try:
+                    stats = self._listDir(rel)
+                except OSError:
+                    continue
+            children[rel] = stats
+            # a folder changed within RACY_SECONDS may change again with the same mtime, list it next time
+            if time.time() - st.st_mtime > dirList.RACY_SECONDS:
+                sigs[rel] = sig
+            stack.extend(path for path, s in stats.items() if s.is_dir)
+        return children, sigs
+
+    def update(self, statFiles=True, save=True):
+        """
+        snapshot the tree again
+        :param statFiles: lstat the files of unchanged folders, False only finds added / removed entries
+        :param save: store the new snapshot, False only compares with the stored one
+        :return: TreeDiff of sorted paths added, removed and modified (files whose size, mtime
+                 or inode changed) since the last snapshot; everything is added the first time
+        """
+        db = self._connect()
+        try:
+            oldChildren, oldSigs = self._load(db)
+            children, sigs = self._walk(oldChildren, oldSigs, statFiles)
+
+            old = dict((p, s) for stats in oldChildren.values() for p, s in stats.items())
+            new = dict((p, s) for stats in children.values() for p, s in stats.items())
+            added = sorted(p for p in new if p not in old)
+            removed = sorted(p for p in old if p not in new)
+            modified = sorted(p for p, s in new.items()
+                              if p in old and (old[p].is_dir != s.is_dir or not s.is_dir and old[p] != s))
+
+            if save:
+                parents = dict((p, parent) for parent, stats in children.items() for p in stats)
+                with db:
+                    db.executemany('DELETE FROM entries WHERE path = ?', ((p,) for p in removed))
+                    db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                                   ((p, parents[p]) + tuple(new[p]) for p in added + modified))
+                    db.execute('DELETE FROM dirs')
+                    db.executemany('INSERT INTO dirs VALUES (?, ?, ?, ?)', ((p,) + s for p, s in sigs.items()))
+            return TreeDiff(added, removed, modified)
+        finally:
+            self._release(db)
+
+    def entries(self):
+        """
+        :return: {path: (is_dir, size, mtime, ino)} of the stored snapshot, size / mtime / ino are None for folders
+        """
+        db = self._connect()
+        try:
+            return dict((path, _Stat(bool(is_dir), size, mtime, ino))
+                        for path, parent, is_dir, size, mtime, ino in db.execute('SELECT * FROM entries'))
+        finally:
+            self._release(db)
+
+    def clear(self):
+        """
+        forget the stored snapshot, the next update reports the whole tree as added
+        """
+        if self._memory is not None:
+            self._memory.close()
+            self._memory = None
+            return
+        try:
+            os.remove(self.dbPath)
+        except OSError:
+            pass
+
+
+def diffTree(root, dbPath=None, statFiles=True, caller=DEFAULT_CALLER):
+    """
+    what changed in root since the last call of the same caller, see TreeSnapshot.update
+    """
+    return TreeSnapshot(root, dbPath, caller).update(statFiles=statFiles)
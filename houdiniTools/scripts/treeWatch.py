@@ -0,0 +1,440 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  14:50
+# Email     : spirit_az@foxmail.com
+# File      : treeWatch.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from . import dirList
+from . import treeSnapshot
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+INOTIFY = 'inotify'
+POLL = 'poll'
+
+# linux/inotify.h
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+_EVENT = struct.Struct('iIII')
+
+# file systems whose changes made on other machines never reach the local inotify
+POLL_FS_TYPES = set(['nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'afs', '9p', 'ceph', 'glusterfs', 'lustre',
+                     'gpfs', 'fuse.sshfs', 'fuse.glusterfs', 'fuse.ceph'])
+
+DEFAULT_DELAY = 0.5
+DEFAULT_POLL_INTERVAL = 5.0
+
+_clock = getattr(time, 'monotonic', time.time)
+_encode = getattr(os, 'fsencode', lambda path: path)
+_decode = getattr(os, 'fsdecode', lambda path: path)
+
+_libc = None
+
+
+def _inotify():
+    """
+    libc with the inotify calls, None when this is not linux or the libc has none
+    """
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc or None
+
+
+def fsType(path):
+    """
+    type of the file system path is on, from /proc/self/mounts; None when unknown
+    """
+    path = os.path.realpath(path)
+    best, bestType = '', None
+    try:
+        with open('/proc/self/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # spaces in mount points are written as \040
+                mountPoint = fields[1].replace('\\040', ' ')
+                prefix = mountPoint.rstrip('/') + '/'
+                if (path == mountPoint or path.startswith(prefix)) and len(mountPoint) >= len(best):
+                    best, bestType = mountPoint, fields[2]
+    except (IOError, OSError):
+        return None
+    return bestType
+
+
+def needsPolling(path):
+    return _inotify() is None or fsType(path) in POLL_FS_TYPES
+
+
+class Watch(object):
+    """
+    one subscription: callback(paths) with the sorted absolute paths changed under root,
+    called on the watcher thread once the events of a burst stopped coming for delay seconds
+    """
+
+    def __init__(self, root, callback, recursive, mode, delay, maxDelay):
+        self.root = os.path.abspath(root)
+        self.callback = callback
+        self.recursive = recursive
+        self.mode = mode
+        self.delay = delay
+        self.maxDelay = maxDelay
+        self.errors = []
+        self._pending = set()
+        self._first = self._last = None
+        # poll state
+        self._snapshot = None
+        self._listing = None
+        self._nextPoll = 0
+        self._pollLock = threading.Lock()
+        self._closed = False
+
+    def covers(self, path):
+        if path == self.root:
+            return True
+        if not path.startswith(self.root.rstrip(os.sep) + os.sep):
+            return False
+        return self.recursive or os.path.dirname(path) == self.root
+
+    def _add(self, path, now):
+        self._pending.add(path)
+        if self._first is None:
+            self._first = now
+        self._last = now
+
+    def _due(self, now):
+        if self._first is None:
+            return None
+        return min(self._last + self.delay, self._first + self.maxDelay)
+
+    def _flush(self):
+        paths = sorted(self._pending)
+        self._pending.clear()
+        self._first = self._last = None
+        for path in paths:
+            dirList.invalidate(path)
+            dirList.invalidate(os.path.dirname(path))
+        try:
+            self.callback(paths)
+        except Exception as e:
+            # a broken callback must not stop the watcher thread
+            self.errors.append(e)
+
+    def _poll(self):
+        """
+        :return: paths changed since the last poll
+        """
+        if self.recursive:
+            with self._pollLock:
+                if self._closed:
+                    return []
+                if self._snapshot is None:
+                    self._snapshot = TreeWatcher.pollSnapshot(self.root)
+                    self._snapshot.update()
+                    return []
+                diff = self._snapshot.update()
+            rels = diff.added + diff.removed + diff.modified
+            return [os.path.join(self.root, rel) for rel in rels]
+
+        try:
+            listing = dict((e.path, (e.is_dir, e.size, e.mtime)) for e in dirList.listEntries(self.root))
+        except OSError:
+            listing = {}
+        old, self._listing = self._listing, listing
+        if old is None:
+            return []
+        return [p for p in set(old) | set(listing) if old.get(p) != listing.get(p)]
+
+    def _close(self):
+        """
+        drop the poll snapshot, waits for a poll running on the watcher thread
+        """
+        with self._pollLock:
+            self._closed = True
+            self._snapshot is not None and self._snapshot.clear()
+            self._snapshot = None
+
+
+class TreeWatcher(object):
+    """
+    calls back when files change under subscribed folders, instead of rescanning them on a timer.
+    Linux local file systems use inotify through ctypes, one watch per folder, new folders are
+    watched as they appear. NFS / SMB and friends, other systems, and trees past the inotify watch
+    limit are polled with a treeSnapshot every pollInterval seconds instead.
+    Bursts of events are coalesced per subscription: the callback gets every changed path once,
+    delay seconds after the last event, at the latest maxDelay seconds after the first one.
+    """
+
+    def __init__(self, delay=DEFAULT_DELAY, pollInterval=DEFAULT_POLL_INTERVAL):
+        self.delay = delay
+        self.pollInterval = pollInterval
+        self._watches = []
+        self._wds = {}
+        self._dirs = {}
+        self._fd = None
+        self._wakeR = self._wakeW = None
+        self._wakeEvent = threading.Event()
+        self._lock = threading.RLock()
+        self._thread = None
+        self._stopped = False
+
+    @staticmethod
+    def pollSnapshot(root):
+        # in memory, one per watch: an update consumes the changes, so watches sharing one would split them
+        return treeSnapshot.TreeSnapshot(root, treeSnapshot.MEMORY)
+
+    # subscribe --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+    def watch(self, root, callback, recursive=True, poll=None, delay=None, maxDelay=None):
+        """
+        :param root: folder to watch
+        :param callback: callback(paths), on the watcher thread; Qt UIs should forward it through a signal
+        :param recursive: also watch every sub folder
+        :param poll: True / False forces polling / inotify, None picks by the file system of root
+        :param delay: seconds of quiet that end a burst, the watcher's delay by default
+        :param maxDelay: longest a busy folder waits for its callback, 10 * delay by default
+        :return: Watch, pass it to unwatch
+        """
+        if poll is None:
+            poll = needsPolling(root)
+        delay = self.delay if delay is None else delay
+        w = Watch(root, callback, recursive, POLL if poll else INOTIFY, delay,
+                  delay * 10 if maxDelay is None else maxDelay)
+        with self._lock:
+            if w.mode == INOTIFY and not self._startInotify():
+                w.mode = POLL
+            if w.mode == INOTIFY:
+                try:
+                    self._addTree(w.root, recursive)
+                except OSError as e:
+                    if e.errno not in (errno.ENOSPC, errno.ENOMEM):
+                        raise
+                    # past fs.inotify.max_user_watches
+                    self._prune()
+                    w.mode = POLL
+            self._watches.append(w)
+            self._startThread()
+        self._wake()
+        return w
+
+    def unwatch(self, w):
+        with self._lock:
+            if w in self._watches:
+                self._watches.remove(w)
+            self._prune()
+        w._close()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            watches, self._watches = self._watches, []
+            self._prune()
+        for w in watches:
+            w._close()
+        self._wake()
+        self._thread is not None and self._thread.join()
+        self._thread = None
+        if self._fd is not None:
+            for fd in (self._fd, self._wakeR, self._wakeW):
+                os.close(fd)
+            self._fd = self._wakeR = self._wakeW = None
+
+    # inotify --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+    def _startInotify(self):
+        if self._fd is not None:
+            return True
+        libc = _inotify()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+        self._fd = fd
+        self._wakeR, self._wakeW = os.pipe()
+        return True
+
+    def _addDir(self, path):
+        wd = _libc.inotify_add_watch(self._fd, _encode(path), WATCH_MASK)
+        if wd < 0:
+            e = ctypes.get_errno()
+            if e in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                # gone already, or not readable
+                return
+            raise OSError(e, os.strerror(e), path)
+        self._wds[wd] = path
+        self._dirs[path] = wd
+
+    def _addTree(self, root, recursive):
+        if not recursive:
+            return self._addDir(root)
+        for folder, subDirs, files in dirList.walk(root):
+            self._addDir(folder)
+
+    def _dropTree(self, root):
+        prefix = root.rstrip(os.sep) + os.sep
+        for path, wd in list(self._dirs.items()):
+            if path == root or path.startswith(prefix):
+                _libc.inotify_rm_watch(self._fd, wd)
+                self._dirs.pop(path, None)
+                self._wds.pop(wd, None)
+
+    def _prune(self):
+        """
+        drop the inotify watches no inotify subscription covers any more
+        """
+        watched = [w for w in self._watches if w.mode == INOTIFY]
+        for path, wd in list(self._dirs.items()):
+            if not any(w.covers(path) and (w.recursive or path == w.root) for w in watched):
+                _libc.inotify_rm_watch(self._fd, wd)
+                self._dirs.pop(path, None)
+                self._wds.pop(wd, None)
+
+    def _readEvents(self, now):
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EINTR):
+                    return
+                raise
+            if not data:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = _decode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                self._event(wd, mask, name, now)
+
+    def _event(self, wd, mask, name, now):
+        with self._lock:
+            if mask & IN_Q_OVERFLOW:
+                # events were lost, every subscription may have missed something
+                for w in self._watches:
+                    w.mode == INOTIFY and w._add(w.root, now)
+                return
+            folder = self._wds.get(wd)
+            if folder is None:
+                return
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+                self._dirs.get(folder) == wd and self._dirs.pop(folder)
+                return
+            path = os.path.join(folder, name) if name else folder
+            if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                # the watches would keep reporting it under its old path
+                self._dropTree(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if any(w.mode == INOTIFY and w.recursive and w.covers(path) for w in self._watches):
+                    try:
+                        self._addTree(path, True)
+                    except OSError:
+                        pass
+            for w in self._watches:
+                if w.mode == INOTIFY and w.covers(path):
+                    w._add(path, now)
+
+    # thread --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+    def _startThread(self):
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='treeWatch')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _wake(self):
+        if self._wakeW is not None:
+            os.write(self._wakeW, b'x')
+        self._wakeEvent.set()
+
+    def _timeout(self, now):
+        due = []
+        for w in self._watches:
+            w._due(now) is not None and due.append(w._due(now))
+            w.mode == POLL and due.append(w._nextPoll)
+        return max(0.0, min(due) - now) if due else None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                timeout = self._timeout(_clock())
+            if self._fd is not None:
+                try:
+                    ready = select.select([self._fd, self._wakeR], [], [], timeout)[0]
+                except (select.error, OSError):
+                    ready = []
+                if self._wakeR in ready:
+                    os.read(self._wakeR, 4096)
+                if self._fd in ready:
+                    self._readEvents(_clock())
+            else:
+                self._wakeEvent.wait(timeout)
+                self._wakeEvent.clear()
+
+            now = _clock()
+            with self._lock:
+                watches = list(self._watches)
+            for w in watches:
+                if w.mode == POLL and now >= w._nextPoll:
+                    w._nextPoll = now + self.pollInterval
+                    for path in w._poll():
+                        w._add(path, now)
+                    w._first is not None and w._flush()
+                elif w._due(now) is not None and now >= w._due(now):
+                    w._flush()
+
+
+_watcher = None
+_watcherLock = threading.Lock()
+
+
+def getWatcher():
+    """
+    session wide watcher, its thread starts with the first watch
+    """
+    global _watcher
+    with _watcherLock:
+        if _watcher is None:
+            _watcher = TreeWatcher()
+        return _watcher
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  13:20
+# Email     : spirit_az@foxmail.com
+# File      : uiCache.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import hashlib
+import marshal
+import os
+import sys
+import time
+import uuid
+
+from . import userDirs
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+ENV_VAR = 'MCL_UI_CACHE'
+# bump when the layout of a cache file changes
+FORMAT = 1
+
+
+def cacheDir():
+    """
+    MCL_UI_CACHE when set, else a folder of the current user only.
+    Cached forms are run as they are read, so files of other users are never loaded, see _read
+    """
+    return os.environ.get(ENV_VAR) or userDirs.userDir('uiCache')
+
+
+def uicVersion(uic):
+    """
+    version string of a pyside2uic / PyQt5.uic module, a new uic invalidates every cached form
+    """
+    return str(getattr(uic, '__version__', None) or getattr(uic, 'Version', None) or 'unknown')
+
+
+def cacheKey(data, uicVer):
+    """
+    content hash of the .ui bytes, the uic version and this python (marshal is python specific)
+    """
+    h = hashlib.sha1()
+    h.update(('%d|%s|%s|' % (FORMAT, sys.version, uicVer)).encode('utf-8'))
+    h.update(data)
+    return h.hexdigest()
+
+
+def formClasses(uiPath):
+    """
+    :return: (widget class name, form class name) of a .ui file
+    """
+    import xml.etree.ElementTree as ElementTree
+    parsed = ElementTree.parse(uiPath)
+    return parsed.find('widget').get('class'), parsed.find('class').text
+
+
+def _writeAtomic(path, data):
+    # unique temp name, so two sessions compiling the same form never write into one file
+    tmp = '%s.%s.tmp' % (path, uuid.uuid4().hex)
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    try:
+        os.replace(tmp, path)
+    except AttributeError:
+        # python 2: rename does not overwrite on windows, but an existing file has the same content
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            os.remove(tmp)
+
+
+def _read(path):
+    if not userDirs.isOwned(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            widgetClass, formClass, code = marshal.loads(f.read())
+        return widgetClass, formClass, code
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def loadCompiled(uiPath, compileSource, uicVer, folder=None):
+    """
+    the compiled form of a .ui file, from the cache when the same .ui was compiled before
+    :param uiPath:
+    :param compileSource: compileSource(uiPath) -> python source of the form, the uic call
+    :param uicVer: see uicVersion
+    :param folder: cache folder, cacheDir() by default
+    :return: (widget class name, form class name, code object to exec)
+    """
+    with open(uiPath, 'rb') as f:
+        data = f.read()
+    key = cacheKey(data, uicVer)
+    try:
+        folder = folder or cacheDir()
+    except OSError:
+        # the cache folder belongs to another user: compile without the cache
+        folder = None
+    path = folder and os.path.join(folder, key + '.formc')
+    cached = path and _read(path)
+    if cached:
+        return cached
+
+    widgetClass, formClass = formClasses(uiPath)
+    source = compileSource(uiPath)
+    code = compile(source, uiPath, 'exec')
+    if folder:
+        try:
+            os.path.isdir(folder) or os.makedirs(folder)
+            # the generated source next to it, for reading only
+            _writeAtomic(os.path.join(folder, key + '.py'), source.encode('utf-8') if not isinstance(source, bytes) else source)
+            _writeAtomic(path, marshal.dumps((widgetClass, formClass, code)))
+        except (IOError, OSError):
+            # read only / full cache folder: the form still loads, it is compiled again next time
+            pass
+        else:
+            # a new entry means an edited .ui, the form it replaces is now stale
+            pruneCache(folder=folder)
+    return widgetClass, formClass, code
+
+
+def pruneCache(maxAge=30 * 24 * 3600, folder=None):
+    """
+    delete cache files not written for maxAge seconds, forms of old .ui versions pile up otherwise
+    :return: files removed
+    """
+    try:
+        folder = folder or cacheDir()
+    except OSError:
+        return 0
+    removed = 0
+    limit = time.time() - maxAge
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(folder, name)
+        try:
+            if os.path.getmtime(path) < limit:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
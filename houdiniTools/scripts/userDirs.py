@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  11:30
+# Email     : spirit_az@foxmail.com
+# File      : userDirs.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import errno
+import os
+import tempfile
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+
+
+def baseDir():
+    """
+    the temp dir on windows, it is per user there; $XDG_CACHE_HOME or ~/.cache/mclTools elsewhere,
+    where the temp dir is shared by every user and any name in it can be taken in advance
+    """
+    if os.name == 'nt':
+        return tempfile.gettempdir().replace('\\', '/')
+    home = os.path.expanduser('~')
+    if home == '~' or not os.path.isdir(home):
+        return os.path.join(tempfile.gettempdir(), 'mclTools-%d' % os.getuid())
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(home, '.cache'), 'mclTools')
+
+
+def userDir(name):
+    """
+    folder name of the current user only, created on first use
+    """
+    folder = os.path.join(baseDir(), name).replace('\\', '/')
+    if not os.path.isdir(folder):
+        try:
+            os.makedirs(folder, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+    if not isOwned(folder):
+        raise OSError(errno.EACCES, 'folder belongs to another user', folder)
+    return folder
+
+
+def isOwned(path):
+    """
+    whether path, not followed when it is a link, belongs to the current user; always True on windows
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    try:
+        return os.lstat(path).st_uid == os.getuid()
+    except OSError:
+        return False
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Time      :  11:05
+# Email     : spirit_az@foxmail.com
+# File      : versionFolder.py
+__author__ = 'ChenLiang.Miao'
+
+# import --+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+import errno
+import os
+import re
+import threading
+
+from . import dirList
+
+# function +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+VERSION_RE = re.compile(r'^v(\d{3,})$')
+
+
+def formatVersion(num):
+    return 'v%03d' % num
+
+
+def parseVersion(name):
+    """
+    :return: 7 for 'v007', None when name is not a version folder
+    """
+    m = VERSION_RE.match(name)
+    return int(m.group(1)) if m else None
+
+
+def scanLatest(folder):
+    """
+    highest vNNN folder number in one directory read, 0 when there is none
+    """
+    latest = 0
+    try:
+        entries = dirList.listEntries(folder, withStat=False)
+    except OSError:
+        return 0
+    for e in entries:
+        if e.is_dir:
+            num = parseVersion(e.name)
+            if num is not None and num > latest:
+                latest = num
+    return latest
+
+
+class VersionAllocator(object):
+    """
+    next free vNNN folder of one publish folder.
+    The folder is scanned once and rescanned only when its mtime moves; the known latest version
+    is also checked forward, which catches versions published in the same mtime tick.
+    reserve() creates the folder with an exclusive mkdir, two artists can never get the same version.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._latest = None
+        self._sig = None
+        self._lock = threading.Lock()
+
+    def _folderSig(self):
+        try:
+            return dirList.statSignature(os.stat(self.folder))
+        except OSError:
+            return None
+
+    def _path(self, num):
+        return os.path.join(self.folder, formatVersion(num))
+
+    def latest(self, refresh=False):
+        """
+        :return: number of the highest existing version, 0 when there is none
+        """
+        with self._lock:
+            sig = self._folderSig()
+            if self._latest is None or refresh or sig != self._sig:
+                self._latest = scanLatest(self.folder)
+                self._sig = sig
+            while os.path.isdir(self._path(self._latest + 1)):
+                self._latest += 1
+            return self._latest
+
+    def peek(self):
+        """
+        name of the next version, nothing is created so it may be taken before it is used
+        """
+        return formatVersion(self.latest() + 1)
+
+    def reserve(self, maxTries=1000):
+        """
+        create the next version folder
+        :return: (name, path)
+        """
+        os.path.isdir(self.folder) or os.makedirs(self.folder)
+        num = self.latest()
+        with self._lock:
+            for _ in range(maxTries):
+                num += 1
+                path = self._path(num)
+                try:
+                    os.mkdir(path)
+                except OSError as e:
+                    if e.errno != errno.EEXIST:
+                        raise
+                    continue
+                self._latest = max(self._latest, num)
+                # our own mkdir moved the folder mtime, take it as the new baseline
+                self._sig = self._folderSig()
+                dirList.invalidate(self.folder)
+                return formatVersion(num), path
+        raise OSError(errno.EEXIST, 'no free version after %d tries' % maxTries, self.folder)
+
+
+_allocators = {}
+_allocLock = threading.Lock()
+
+
+def getAllocator(folder):
+    """
+    session wide allocator of folder, kept so repeated publishes skip the scan
+    """
+    key = os.path.normcase(os.path.abspath(folder))
+    with _allocLock:
+        alloc = _allocators.get(key)
+        if alloc is None:
+            alloc = _allocators[key] = VersionAllocator(folder)
+        return alloc
@@ -12,23 +12,19 @@ __author__ = 'ChenLiang.Miao'
 
 
 import os
-import pathlib
+import sys
 
-try:
-    from . import script_tool
-except Exception:
-    import script_tool
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import buildAssets
 
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-def run():
-    command_tool = 'C:/Program Files/ImageMagick-7.1.0-Q16/magick.exe'
-    icons = script_tool.get_script_path().parent.joinpath("icons")  # type: pathlib.Path
-    for each in icons.glob("**/*.png"):
-        command = '"{0}" {1} {2}'.format(
-            command_tool, str(each), str(each))
-        os.popen2(command)
+def run(force=False):
+    """
+    rewrite the changed icons of mayaTools/icons with magick, dropping their broken color profile, see buildAssets
+    """
+    return buildAssets.build(['maya-png'], force=force)
 
 
 if __name__ == "__main__":
-    run()
+    sys.exit(buildAssets.main(sys.argv[1:], targets=['maya-png']))
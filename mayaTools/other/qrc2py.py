@@ -12,24 +12,19 @@ __author__ = 'ChenLiang.Miao'
 
 
 import os
-import pathlib
+import sys
 
-try:
-    from . import script_tool
-except ImportError:
-    import script_tool
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import buildAssets
 
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-def run():
-    command_tool = 'C:/ProgramData/Anaconda3/envs/py37/Scripts/pyrcc5.exe'
-    ui = script_tool.get_script_path().parent.joinpath("scripts", "UI")  # type: pathlib.Path
-    for each in ui.glob("**/*.qrc"):
-        no_flag = each.with_suffix('')
-        command = '"{0}" -o {1}_rc.py {2}.qrc'.format(
-            command_tool, str(no_flag), str(no_flag))
-        os.popen2(command)
+def run(force=False):
+    """
+    build the changed .qrc of mayaTools/scripts/UI to _rc.py with pyrcc5, see buildAssets
+    """
+    return buildAssets.build(['maya-qrc'], force=force)
 
 
 if __name__ == "__main__":
-    run()
+    sys.exit(buildAssets.main(sys.argv[1:], targets=['maya-qrc']))
@@ -1,43 +1,30 @@
 #!/usr/bin/env python
-# -*- coding:UTF-8 -*-
-
+# -*- coding: UTF-8 -*-
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
+
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 __author__ = 'ChenLiang.Miao'
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-import os
-import pathlib
 
-try:
-    from . import script_tool
-except Exception:
-    import script_tool
 
-import pyside2uic
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import buildAssets
 
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-def uic2py(name):
+def run(force=False):
     """
-    :param name:
-    :return:
+    build the changed .ui forms of mayaTools/scripts/UI to Qt.py modules, see buildAssets
     """
-    py_file = str(name).replace('.ui', '.py')
-    with open(py_file, 'w') as f:
-        pyside2uic.compileUi(name, f)
-
-    change2qt(py_file)
-
-
-def change2qt(py_file):
-    print(py_file)
-    os.system('python -m Qt --convert "{}"'.format(py_file))
+    return buildAssets.build(['maya-ui'], force=force)
 
 
-if __name__ == '__main__':
-    ui = script_tool.get_script_path().parent.joinpath("UI")  # type: pathlib.Path
-    [uic2py(str(x)) for x in ui.glob("**/*.ui")]
+if __name__ == "__main__":
+    sys.exit(buildAssets.main(sys.argv[1:], targets=['maya-ui']))
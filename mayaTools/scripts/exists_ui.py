@@ -10,6 +10,8 @@ __author__ = 'ChenLiang.Miao'
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
 
+import collections
+
 import maya.OpenMayaUI as mui
 import maya.cmds as cmds
 from Qt import QtCompat as QtCompat
@@ -197,3 +199,107 @@ class MSplashScreenNew(QtWidgets.QSplashScreen):
     def closeEvent(self, *args):
         self.movie.stop()
         super(MSplashScreenNew, self).closeEvent(*args)
+
+
+# +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
+# called when a tool became interactive: func(name, ms, steps), steps [(step name, ms), ...]
+# kept over a reload of this module, hooks are added once per session
+try:
+    startup_hooks
+except NameError:
+    startup_hooks = []
+
+
+def add_startup_hook(func):
+    """
+    report the time to interactive of every tool start, e.g. to a log
+    """
+    startup_hooks.append(func)
+    return func
+
+
+class MStartupPipeline(QtCore.QObject):
+    """
+    builds a tool window in steps, one per turn of the event loop off a zero interval timer,
+    so the splash keeps animating in between and closes as soon as the window is shown.
+        pipe = MStartupPipeline('tool name', splash)
+        pipe.add(make_window, window=True).add(show_window)
+        pipe.start()
+    """
+    interactive = QtCore.Signal(float)
+
+    # running pipelines, so one is not collected before its last step
+    _running = set()
+
+    def __init__(self, name, splash=None, min_display=0, parent=None):
+        """
+        :param min_display: ms the splash stays at least, 0 closes it as soon as the window is ready
+        """
+        super(MStartupPipeline, self).__init__(parent)
+        self.name = name
+        self.splash = splash
+        self.min_display = min_display
+        self.window = None
+        self.steps = []
+        self.times = []
+        self.tti = None
+        self._queue = collections.deque()
+        self._clock = QtCore.QElapsedTimer()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._next)
+
+    def add(self, func, name=None, window=False):
+        """
+        :param window: func returns the window the splash finishes on
+        """
+        self.steps.append((name or func.__name__, func, window))
+        return self
+
+    def start(self):
+        self._clock.start()
+        self._queue.extend(self.steps)
+        MStartupPipeline._running.add(self)
+        self.splash and self.splash.show()
+        self._timer.start()
+        return self
+
+    def _next(self):
+        if not self._queue:
+            self._timer.stop()
+            remaining = self.min_display - self._clock.elapsed()
+            if remaining > 0:
+                QtCore.QTimer.singleShot(remaining, self._ready)
+            else:
+                self._ready()
+            return
+        name, func, window = self._queue.popleft()
+        t = QtCore.QElapsedTimer()
+        t.start()
+        try:
+            result = func()
+        except Exception:
+            self._stop()
+            raise
+        self.times.append((name, t.elapsed()))
+        if window:
+            self.window = result
+
+    def _ready(self):
+        if self.splash:
+            self.splash.close()
+        # the window is painted once the loop gets back here
+        QtCore.QTimer.singleShot(0, self._interactive)
+
+    def _interactive(self):
+        self.tti = self._clock.elapsed()
+        MStartupPipeline._running.discard(self)
+        self.interactive.emit(float(self.tti))
+        for hook in list(startup_hooks):
+            hook(self.name, self.tti, list(self.times))
+
+    def _stop(self):
+        self._timer.stop()
+        self._queue.clear()
+        self.splash and self.splash.close()
+        MStartupPipeline._running.discard(self)
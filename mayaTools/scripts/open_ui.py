@@ -167,13 +167,31 @@ class MainFunc(window_class, base_class):
 
 
 # +--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+--+ #
-def encryption(restore=False):
+def _make_window():
     if names[main_win_name] is None:
         names[main_win_name] = MainFunc(parent=maya_win)
         names[main_win_name].setObjectName(main_win_name)
         names[main_win_name].setWindowTitle(main_win_name + script_version)
+    return names[main_win_name]
+
+
+def _show_window():
+    names[main_win_name].run()
 
+
+# ms the splash stays at least, 0 closes it as soon as the window is shown
+splash_min_ms = 0
+_startup = None
+
+
+def encryption(restore=False):
+    """
+    :return: the window; without restore it is built and shown off the event loop while the splash animates,
+             None until then, the startup pipeline's interactive signal / ex_ui.add_startup_hook tell when
+    """
+    global _startup
     if restore:
+        _make_window()
         restored_control = ex_ui.mui.MQtUtil.getCurrentParent()
         mixin_ptr = ex_ui.mui.MQtUtil.findControl(names[main_win_name].objectName())
         ex_ui.mui.MQtUtil.addWidgetToMayaLayout(
@@ -186,12 +204,8 @@ def encryption(restore=False):
             __author__,
             ex_ui.QtCore.Qt.AlignLeft | ex_ui.QtCore.Qt.AlignBottom,
             ex_ui.QtCore.Qt.yellow)
-        splash.show()
-        t = ex_ui.QtCore.QElapsedTimer()
-        t.start()
-        while t.elapsed() < 600:
-            ex_ui.QtCore.QCoreApplication.processEvents()
-        splash.finish(names[main_win_name])
-        names[main_win_name].run()
+        _startup = ex_ui.MStartupPipeline(main_win_name, splash, splash_min_ms)
+        _startup.add(_make_window, 'window', window=True).add(_show_window, 'show')
+        _startup.start()
 
     return names[main_win_name]